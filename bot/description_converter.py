@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+
+from config import settings
+
+_executor: ProcessPoolExecutor | None = None
+_cache: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+
+
+def convert_description(description_html: str, file_format: str) -> str:
+    if file_format == "md":
+        return markdownify(description_html)
+    return BeautifulSoup(description_html, "lxml").get_text(separator=" ", strip=True)
+
+
+def _convert_batch(descriptions: list[str], file_format: str) -> list[str]:
+    return [convert_description(html, file_format) for html in descriptions]
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, settings.EXPORT_CONVERTER_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_converter_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _cache_key(vacancy: dict, file_format: str) -> tuple[str, str, str]:
+    description_html = vacancy.get("description") or ""
+    digest = hashlib.sha1(description_html.encode("utf-8")).hexdigest()
+    return vacancy.get("url", ""), file_format, digest
+
+
+async def convert_descriptions(vacancies: list[dict], file_format: str) -> list[str]:
+    keys = [_cache_key(vacancy, file_format) for vacancy in vacancies]
+    results = {key: _cache[key] for key in keys if key in _cache}
+
+    pending = {}
+    for key, vacancy in zip(keys, vacancies):
+        if key not in results:
+            pending[key] = vacancy.get("description") or ""
+
+    if pending:
+        pending_keys = list(pending)
+        chunk_size = max(1, settings.EXPORT_CONVERSION_CHUNK_SIZE)
+        chunks = [
+            pending_keys[start : start + chunk_size]
+            for start in range(0, len(pending_keys), chunk_size)
+        ]
+        loop = asyncio.get_running_loop()
+        executor = _get_executor()
+        converted_chunks = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    executor,
+                    _convert_batch,
+                    [pending[key] for key in chunk],
+                    file_format,
+                )
+                for chunk in chunks
+            ]
+        )
+        for chunk, converted in zip(chunks, converted_chunks):
+            for key, description in zip(chunk, converted):
+                results[key] = description
+                _cache[key] = description
+
+    for key in keys:
+        if key in _cache:
+            _cache.move_to_end(key)
+    while len(_cache) > settings.EXPORT_CONVERSION_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return [results[key] for key in keys]
@@ -0,0 +1,116 @@
+import csv
+import gzip
+import io
+import re
+import shutil
+import zipfile
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import AsyncGenerator
+
+from aiogram import Bot
+from aiogram.types import InputFile
+
+from config import settings
+
+CSV_FIELDNAMES = ["url", "title", "salary", "company", "location", "description"]
+
+
+class SpooledInputFile(InputFile):
+    def __init__(self, file: SpooledTemporaryFile, filename: str, size: int):
+        super().__init__(filename=filename)
+        self.file = file
+        self.size = size
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+class ExportWriter:
+    def __init__(self, file_format: str, name: str):
+        self.file_format = file_format
+        self.name = name
+        self.count = 0
+        self._file = SpooledTemporaryFile(
+            max_size=settings.EXPORT_SPOOL_MAX_MEMORY_BYTES
+        )
+        self._row_buffer = io.StringIO()
+
+        if file_format == "csv":
+            self._csv_writer = csv.DictWriter(
+                self._row_buffer, fieldnames=CSV_FIELDNAMES, extrasaction="ignore"
+            )
+            self._csv_writer.writeheader()
+            self._flush_row_buffer()
+            self.filename = f"vacancies_{name}.csv"
+        elif file_format == "md":
+            self._write_text(f"# Результаты по подписке: {name}\n\n")
+            timestamp = datetime.now().strftime("%Y-%m-%d")
+            self.filename = f"vacancies_{name}_{timestamp}.md"
+        else:
+            raise ValueError(f"Unsupported export format: {file_format}")
+
+    def _write_text(self, text: str):
+        self._file.write(text.encode("utf-8"))
+
+    def _flush_row_buffer(self):
+        self._write_text(self._row_buffer.getvalue())
+        self._row_buffer.seek(0)
+        self._row_buffer.truncate()
+
+    def write(self, item: dict):
+        if self.file_format == "csv":
+            self._csv_writer.writerow(item)
+            self._flush_row_buffer()
+        else:
+            md_chunk = (
+                f"## [{item.get('title', 'N/A')}]({item.get('url', '#')})\n\n"
+                f"**Компания:** {item.get('company', 'N/A')}\n"
+                f"**Зарплата:** {item.get('salary', 'N/A')}\n"
+                f"**Локация:** {item.get('location', 'N/A')}\n\n"
+                f"### Описание\n\n{item.get('description', 'N/A')}\n\n"
+                "---\n\n"
+            )
+            self._write_text(re.sub(r"\n{3,}", "\n\n", md_chunk))
+        self.count += 1
+
+    def _compress(self) -> tuple[SpooledTemporaryFile, str]:
+        compressed = SpooledTemporaryFile(
+            max_size=settings.EXPORT_SPOOL_MAX_MEMORY_BYTES
+        )
+        self._file.seek(0)
+        if settings.EXPORT_COMPRESSION == "gzip":
+            with gzip.GzipFile(
+                filename=self.filename, mode="wb", fileobj=compressed
+            ) as archive:
+                shutil.copyfileobj(self._file, archive)
+            filename = f"{self.filename}.gz"
+        else:
+            with zipfile.ZipFile(
+                compressed, mode="w", compression=zipfile.ZIP_DEFLATED
+            ) as archive:
+                with archive.open(self.filename, mode="w") as entry:
+                    shutil.copyfileobj(self._file, entry)
+            filename = f"{self.filename.rsplit('.', 1)[0]}.zip"
+        self._file.close()
+        return compressed, filename
+
+    def finish(self) -> SpooledInputFile | None:
+        if not self.count:
+            self._file.close()
+            return None
+
+        size = self._file.tell()
+        file, filename = self._file, self.filename
+        if (
+            settings.EXPORT_COMPRESSION in ("gzip", "zip")
+            and size > settings.EXPORT_COMPRESS_THRESHOLD_BYTES
+        ):
+            file, filename = self._compress()
+            size = file.tell()
+        return SpooledInputFile(file, filename=filename, size=size)
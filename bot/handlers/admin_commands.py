@@ -5,7 +5,8 @@ from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
-from database.models import User
+from database.models import Subscription, User
+from database.subscriptions import delete_subscriptions
 
 router = Router()
 
@@ -53,6 +54,7 @@ async def del_user(message: Message, command: Command, session: AsyncSession):
         await message.answer("Вы не можете удалить самого себя.")
         return
 
+    await delete_subscriptions(session, Subscription.user_id == user_id)
     query = delete(User).where(User.telegram_id == user_id)
     result = await session.execute(query)
 
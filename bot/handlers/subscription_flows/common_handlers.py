@@ -1,19 +1,16 @@
 import asyncio
-import csv
-import io
 import json
 import logging
-import re
-from datetime import datetime
+from typing import AsyncIterator
 
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BufferedInputFile, CallbackQuery, Message
-from bs4 import BeautifulSoup
-from markdownify import markdownify
-from sqlalchemy import delete, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from aiogram.types import CallbackQuery, Message
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from bot.description_converter import convert_descriptions
+from bot.export_writer import ExportWriter, SpooledInputFile
 from bot.fsm import CombinedSubscriptionStates, SubscriptionStates
 from bot.keyboards import (
     belmeta_config_keyboard,
@@ -26,15 +23,28 @@ from bot.keyboards import (
     subscription_group_detail_keyboard,
     subscription_type_keyboard,
 )
-from database.models import Subscription, User
+from config import settings
+from database.known_urls import known_url_index
+from database.models import Subscription, User, Vacancy
+from database.subscriptions import delete_subscriptions
+from database.vacancies import load_pending_details, update_vacancy_details
 from scrapers.belmeta_scraper import BelmetaScraper
+from scrapers.detail_cache import detail_cache
 from scrapers.devby_scraper import DevbyScraper
 from scrapers.habr_scraper import HabrScraper
 from scrapers.praca_scraper import PracaScraper
 from scrapers.rabota_scraper import RabotaScraper
+from scrapers.search_config import (
+    create_scraper,
+    get_search_config,
+    keyword_filter,
+    matches_keyword,
+)
 
 router = Router()
 
+EXPORT_CHUNK_SIZE = 200
+
 with open("filters.json", "r", encoding="utf-8") as f:
     ALL_FILTERS = json.load(f)
 
@@ -186,16 +196,19 @@ def _generate_summary_text(subscription: Subscription) -> str:
     return "\n".join(summary_lines)
 
 
-def _deduplicate_vacancies(vacancies: list[dict]) -> list[dict]:
+async def _deduplicate_vacancies(
+    vacancies: AsyncIterator[dict],
+) -> AsyncIterator[dict]:
     seen = set()
-    deduplicated_list = []
-    for vacancy in vacancies:
+    total = 0
+    async for vacancy in vacancies:
+        total += 1
         company = vacancy.get("company", "").lower().strip()
         title = vacancy.get("title", "").lower().strip()
         if (company, title) not in seen:
             seen.add((company, title))
-            deduplicated_list.append(vacancy)
-    return deduplicated_list
+            yield vacancy
+    logging.info(f"Total vacancies: {total}, after deduplication: {len(seen)}")
 
 
 async def _get_scraper_for_subscription(
@@ -204,74 +217,168 @@ async def _get_scraper_for_subscription(
     RabotaScraper | HabrScraper | DevbyScraper | BelmetaScraper | PracaScraper | None,
     dict,
 ]:
-    scraper, params = (None, None)
-    if subscription.search_type == "rabota_by":
-        search_config = subscription.search_params
-        scraper = RabotaScraper(city=search_config.get("city", "minsk"))
-        params = search_config.get("params", {})
-    elif subscription.search_type == "habr_career":
-        scraper = HabrScraper()
-        params = subscription.search_params
-    elif subscription.search_type == "dev_by":
-        scraper = DevbyScraper()
-        params = {}
-    elif subscription.search_type == "belmeta_com":
-        scraper = BelmetaScraper()
-        params = subscription.search_params
-    elif subscription.search_type == "praca_by":
-        scraper = PracaScraper()
-        params = subscription.search_params
-    return scraper, params
+    city, params, _ = get_search_config(subscription)
+    return create_scraper(subscription.search_type, city), params
 
 
-async def _generate_export_file(
-    vacancies: list[dict], file_format: str, name: str
-) -> tuple[BufferedInputFile | None, str | None]:
-    file_data, filename = (None, "")
-    if not vacancies:
-        return None, None
-
-    processed_vacancies = []
-    for vacancy in vacancies:
+async def _iter_stored_vacancies(
+    session: AsyncSession, subscription: Subscription
+) -> AsyncIterator[dict]:
+    query = (
+        select(Vacancy)
+        .where(Vacancy.subscription_id == subscription.id)
+        .order_by(Vacancy.id.desc())
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    async for vacancy in await session.stream_scalars(query):
+        yield {
+            "url": vacancy.url,
+            "title": vacancy.title,
+            "salary": vacancy.salary,
+            "company": vacancy.company,
+            "location": vacancy.location,
+            "description": vacancy.description,
+        }
+
+
+async def _fill_pending_details(session: AsyncSession, subscription: Subscription):
+    if settings.EXPORT_TOP_UP_MAX_VACANCIES <= 0:
+        return
+
+    urls = await load_pending_details(
+        session, [subscription.id], limit=settings.EXPORT_TOP_UP_MAX_VACANCIES
+    )
+    if not urls:
+        return
+
+    scraper, _ = await _get_scraper_for_subscription(subscription)
+    if not scraper:
+        return
+
+    logging.info(
+        f"Fetching missing details for {len(urls)} stored vacancies of "
+        f"'{subscription.name}' before export."
+    )
+    results = await asyncio.gather(
+        *[detail_cache.get_or_fetch(scraper, url) for url in urls]
+    )
+    fetched = {url: details for url, details in zip(urls, results) if details}
+    await update_vacancy_details(session, [subscription.id], fetched)
+    await session.commit()
+
+
+async def _top_up_vacancies(
+    session: AsyncSession, subscription: Subscription
+) -> list[dict]:
+    if settings.EXPORT_TOP_UP_MAX_VACANCIES <= 0:
+        return []
+
+    scraper, params = await _get_scraper_for_subscription(subscription)
+    if not scraper:
+        return []
+
+    urls_on_page, _ = await scraper.get_vacancy_urls_from_page(params, 0)
+    if not urls_on_page:
+        return []
+
+    new_urls = await known_url_index.filter_new(session, subscription.id, urls_on_page)
+    if not new_urls:
+        return []
+
+    new_urls = new_urls[: settings.EXPORT_TOP_UP_MAX_VACANCIES]
+    logging.info(
+        f"Topping up export of '{subscription.name}' with {len(new_urls)} unseen vacancies."
+    )
+    results = await asyncio.gather(
+        *[detail_cache.get_or_fetch(scraper, url) for url in new_urls]
+    )
+
+    keyword = keyword_filter(subscription)
+    return [
+        details
+        for details in results
+        if details and (not keyword or matches_keyword(keyword, details))
+    ]
+
+
+async def _collect_vacancies(
+    session: AsyncSession, subscription: Subscription, source: str
+) -> list[dict]:
+    if source == "live":
+        scraper, params = await _get_scraper_for_subscription(subscription)
+        if not scraper:
+            return []
+        return await scraper.scrape_all_vacancies(params)
+
+    try:
+        await _fill_pending_details(session, subscription)
+    except Exception as e:
+        logging.error(
+            f"Could not fill in missing details for subscription {subscription.id}: {e}",
+            exc_info=True,
+        )
+        await session.rollback()
+
+    try:
+        fresh_vacancies = await _top_up_vacancies(session, subscription)
+    except Exception as e:
+        logging.error(
+            f"Could not top up export for subscription {subscription.id}: {e}",
+            exc_info=True,
+        )
+        fresh_vacancies = []
+    return fresh_vacancies
+
+
+async def _collect_with_own_session(
+    session_factory: async_sessionmaker[AsyncSession],
+    subscription: Subscription,
+    source: str,
+) -> list[dict]:
+    async with session_factory() as session:
+        return await _collect_vacancies(session, subscription, source)
+
+
+async def _iter_export_vacancies(
+    session: AsyncSession,
+    subscription: Subscription,
+    fresh_vacancies: list[dict],
+    source: str,
+) -> AsyncIterator[dict]:
+    for vacancy in fresh_vacancies:
+        yield vacancy
+    if source != "live":
+        async for vacancy in _iter_stored_vacancies(session, subscription):
+            yield vacancy
+
+
+async def _write_export_chunk(
+    writer: ExportWriter, vacancies: list[dict], file_format: str
+):
+    descriptions = await convert_descriptions(vacancies, file_format)
+    for vacancy, description in zip(vacancies, descriptions):
         processed_vacancy = vacancy.copy()
         processed_vacancy.pop("apply_url", None)
+        processed_vacancy["description"] = description
+        writer.write(processed_vacancy)
 
-        description_html = processed_vacancy.get("description", "")
-        if file_format == "md":
-            processed_vacancy["description"] = markdownify(description_html)
-        else:
-            processed_vacancy["description"] = BeautifulSoup(
-                description_html, "lxml"
-            ).get_text(separator=" ", strip=True)
-        processed_vacancies.append(processed_vacancy)
-
-    if not processed_vacancies:
-        return None, None
-
-    if file_format == "csv":
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=processed_vacancies[0].keys())
-        writer.writeheader()
-        writer.writerows(processed_vacancies)
-        file_data = output.getvalue().encode("utf-8")
-        filename = f"vacancies_{name}.csv"
-    elif file_format == "md":
-        md_content = f"# Результаты по подписке: {name}\n\n"
-        for item in processed_vacancies:
-            md_content += f"## [{item.get('title', 'N/A')}]({item.get('url', '#')})\n\n"
-            md_content += f"**Компания:** {item.get('company', 'N/A')}\n"
-            md_content += f"**Зарплата:** {item.get('salary', 'N/A')}\n"
-            md_content += f"**Локация:** {item.get('location', 'N/A')}\n\n"
-            md_content += f"### Описание\n\n{item.get('description', 'N/A')}\n\n"
-            md_content += "---\n\n"
-
-        md_content = re.sub(r"\n{3,}", "\n\n", md_content).strip()
-        file_data = md_content.encode("utf-8")
-        timestamp = datetime.now().strftime("%Y-%m-%d")
-        filename = f"vacancies_{name}_{timestamp}.md"
-
-    if file_data and filename:
-        return BufferedInputFile(file_data, filename=filename), filename
+
+async def _generate_export_file(
+    vacancies: AsyncIterator[dict], file_format: str, name: str
+) -> tuple[SpooledInputFile | None, str | None]:
+    writer = ExportWriter(file_format, name)
+    chunk = []
+    async for vacancy in vacancies:
+        chunk.append(vacancy)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            await _write_export_chunk(writer, chunk, file_format)
+            chunk = []
+    if chunk:
+        await _write_export_chunk(writer, chunk, file_format)
+
+    input_file = writer.finish()
+    if input_file:
+        return input_file, input_file.filename
     return None, None
 
 
@@ -595,11 +702,11 @@ async def delete_subscription_group(
     callback: CallbackQuery, session: AsyncSession, user: User, state: FSMContext
 ):
     group_name = callback.data.split(":", 1)[1]
-    await session.execute(
-        delete(Subscription).where(
-            Subscription.name == group_name, Subscription.user_id == user.telegram_id
-        )
+    group_filter = (
+        Subscription.name == group_name,
+        Subscription.user_id == user.telegram_id,
     )
+    await delete_subscriptions(session, *group_filter)
     await session.commit()
     await callback.answer("Группа подписок удалена.", show_alert=True)
     from bot.handlers.user_commands import handle_my_subscriptions
@@ -612,11 +719,8 @@ async def delete_subscription(
     callback: CallbackQuery, session: AsyncSession, user: User, state: FSMContext
 ):
     sub_id = int(callback.data.split("_")[2])
-    await session.execute(
-        delete(Subscription).where(
-            Subscription.id == sub_id, Subscription.user_id == user.telegram_id
-        )
-    )
+    sub_filter = (Subscription.id == sub_id, Subscription.user_id == user.telegram_id)
+    await delete_subscriptions(session, *sub_filter)
     await session.commit()
     await callback.answer("Подписка удалена.", show_alert=True)
     from bot.handlers.user_commands import handle_my_subscriptions
@@ -699,8 +803,9 @@ async def show_group_export_menu(callback: CallbackQuery):
 async def export_subscription_to_file(
     callback: CallbackQuery, session: AsyncSession, user: User
 ):
-    _, sub_id_str, export_format = callback.data.split(":")
+    _, sub_id_str, export_format, *options = callback.data.split(":")
     sub_id = int(sub_id_str)
+    source = options[0] if options else "db"
 
     query = select(Subscription).where(
         Subscription.id == sub_id, Subscription.user_id == user.telegram_id
@@ -714,24 +819,24 @@ async def export_subscription_to_file(
     await callback.answer()
 
     try:
-        scraper, params = await _get_scraper_for_subscription(subscription)
-        if not scraper:
+        if subscription.search_type not in PLATFORM_CONFIG:
             await callback.message.edit_text("❌ Неподдерживаемый тип подписки.")
             return
 
-        vacancies = await scraper.scrape_all_vacancies(params)
-        if not vacancies:
-            await callback.message.edit_text("😕 По вашему запросу ничего не найдено.")
-            return
-
+        fresh_vacancies = await _collect_vacancies(session, subscription, source)
         input_file, _ = await _generate_export_file(
-            vacancies, export_format, subscription.name
+            _iter_export_vacancies(session, subscription, fresh_vacancies, source),
+            export_format,
+            subscription.name,
         )
         if input_file:
-            await callback.bot.send_document(callback.from_user.id, input_file)
+            try:
+                await callback.bot.send_document(callback.from_user.id, input_file)
+            finally:
+                input_file.close()
             await callback.message.delete()
         else:
-            await callback.message.edit_text("❌ Не удалось сформировать файл.")
+            await callback.message.edit_text("😕 По вашему запросу ничего не найдено.")
     except Exception as e:
         logging.error(f"Failed to export subscription {sub_id}: {e}", exc_info=True)
         await callback.message.edit_text(f"❌ Произошла ошибка: {e}")
@@ -739,9 +844,13 @@ async def export_subscription_to_file(
 
 @router.callback_query(F.data.startswith("export_group_to:"))
 async def export_subscription_group_to_file(
-    callback: CallbackQuery, session: AsyncSession, user: User
+    callback: CallbackQuery,
+    session: AsyncSession,
+    session_factory: async_sessionmaker[AsyncSession],
+    user: User,
 ):
-    _, group_name, export_format = callback.data.split(":")
+    _, group_name, export_format, *options = callback.data.split(":")
+    source = options[0] if options else "db"
 
     query = select(Subscription).where(
         Subscription.name == group_name, Subscription.user_id == user.telegram_id
@@ -751,45 +860,42 @@ async def export_subscription_group_to_file(
         await callback.answer("Группа подписок не найдена.", show_alert=True)
         return
 
-    await callback.message.edit_text(
-        "⏳ Собираю вакансии со всех сайтов. Это может занять некоторое время..."
-    )
+    if source == "live":
+        await callback.message.edit_text(
+            "⏳ Собираю вакансии со всех сайтов. Это может занять некоторое время..."
+        )
+    else:
+        await callback.message.edit_text("⏳ Собираю вакансии по вашему запросу...")
     await callback.answer()
 
     try:
-        all_vacancies = []
-        tasks = []
-
-        async def scrape_and_collect(sub):
-            scraper, params = await _get_scraper_for_subscription(sub)
-            if scraper:
-                return await scraper.scrape_all_vacancies(params)
-            return []
-
-        for sub in subscriptions:
-            tasks.append(scrape_and_collect(sub))
-
-        results = await asyncio.gather(*tasks)
-        for result_list in results:
-            all_vacancies.extend(result_list)
-
-        if not all_vacancies:
-            await callback.message.edit_text("😕 По вашему запросу ничего не найдено.")
-            return
-
-        deduplicated_vacancies = _deduplicate_vacancies(all_vacancies)
-        logging.info(
-            f"Total vacancies: {len(all_vacancies)}, after deduplication: {len(deduplicated_vacancies)}"
+        fresh_by_sub = await asyncio.gather(
+            *[
+                _collect_with_own_session(session_factory, sub, source)
+                for sub in subscriptions
+            ]
         )
 
+        async def iter_group_vacancies():
+            for sub, fresh_vacancies in zip(subscriptions, fresh_by_sub):
+                async for vacancy in _iter_export_vacancies(
+                    session, sub, fresh_vacancies, source
+                ):
+                    yield vacancy
+
         input_file, _ = await _generate_export_file(
-            deduplicated_vacancies, export_format, group_name
+            _deduplicate_vacancies(iter_group_vacancies()),
+            export_format,
+            group_name,
         )
         if input_file:
-            await callback.bot.send_document(callback.from_user.id, input_file)
+            try:
+                await callback.bot.send_document(callback.from_user.id, input_file)
+            finally:
+                input_file.close()
             await callback.message.delete()
         else:
-            await callback.message.edit_text("❌ Не удалось сформировать файл.")
+            await callback.message.edit_text("😕 По вашему запросу ничего не найдено.")
     except Exception as e:
         logging.error(
             f"Failed to export subscription group {group_name}: {e}", exc_info=True
@@ -122,6 +122,12 @@ def export_format_keyboard(sub_id: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="CSV", callback_data=f"export_to:{sub_id}:csv")
     builder.button(text="Markdown", callback_data=f"export_to:{sub_id}:md")
+    builder.button(
+        text="CSV (новый поиск)", callback_data=f"export_to:{sub_id}:csv:live"
+    )
+    builder.button(
+        text="Markdown (новый поиск)", callback_data=f"export_to:{sub_id}:md:live"
+    )
     builder.adjust(2)
     builder.row(
         InlineKeyboardButton(
@@ -135,6 +141,15 @@ def export_group_format_keyboard(group_name: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="CSV", callback_data=f"export_group_to:{group_name}:csv")
     builder.button(text="Markdown", callback_data=f"export_group_to:{group_name}:md")
+    if len(f"export_group_to:{group_name}:csv:live".encode("utf-8")) <= 64:
+        builder.button(
+            text="CSV (новый поиск)",
+            callback_data=f"export_group_to:{group_name}:csv:live",
+        )
+        builder.button(
+            text="Markdown (новый поиск)",
+            callback_data=f"export_group_to:{group_name}:md:live",
+        )
     builder.adjust(2)
     builder.row(
         InlineKeyboardButton(
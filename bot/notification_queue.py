@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+
+from config import settings
+from scrapers.rate_limiter import TokenBucket
+
+
+@dataclass
+class Notification:
+    chat_id: int
+    text: str
+    reply_markup: InlineKeyboardMarkup | None = None
+    attempts: int = 0
+
+
+class NotificationQueue:
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int,
+        global_rate: float,
+        per_chat_interval: float,
+        max_attempts: int = 5,
+    ):
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.per_chat_interval = per_chat_interval
+        self.max_attempts = max_attempts
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._chat_queues: dict[int, deque[Notification]] = {}
+        self._next_send_at: dict[int, float] = {}
+        self._global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self._pending = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._paused_until = 0.0
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"notification-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logging.info(f"Notification queue started with {self.workers} worker(s).")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"Notification queue stopped with {self.pending} undelivered message(s)."
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ):
+        self._pending += 1
+        self._drained.clear()
+        notification = Notification(chat_id, text, reply_markup)
+        chat_queue = self._chat_queues.get(chat_id)
+        if chat_queue is not None:
+            chat_queue.append(notification)
+            return
+        self._chat_queues[chat_id] = deque([notification])
+        self._schedule_chat(chat_id)
+
+    def _schedule_chat(self, chat_id: int):
+        delay = self._next_send_at.get(chat_id, 0.0) - time.monotonic()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(
+                delay, self._ready.put_nowait, chat_id
+            )
+        else:
+            self._ready.put_nowait(chat_id)
+
+    async def _wait_for_pause(self):
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+
+    async def _deliver(self, notification: Notification) -> bool:
+        await self._wait_for_pause()
+        await self._global_bucket.acquire()
+
+        notification.attempts += 1
+        try:
+            await self.bot.send_message(
+                notification.chat_id,
+                notification.text,
+                reply_markup=notification.reply_markup,
+                disable_web_page_preview=True,
+            )
+        except TelegramRetryAfter as e:
+            logging.warning(
+                f"Telegram flood control hit for chat {notification.chat_id}. "
+                f"Pausing delivery for {e.retry_after} seconds."
+            )
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + e.retry_after
+            )
+            if notification.attempts < self.max_attempts:
+                return False
+            logging.error(
+                f"Dropping notification for chat {notification.chat_id} after "
+                f"{notification.attempts} attempts."
+            )
+        except TelegramAPIError as e:
+            logging.error(
+                f"Failed to deliver notification to chat {notification.chat_id}: {e}"
+            )
+        return True
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._ready.get()
+            chat_queue = self._chat_queues[chat_id]
+            notification = chat_queue.popleft()
+            done = True
+            try:
+                done = await self._deliver(notification)
+            except Exception as e:
+                logging.error(
+                    f"Unexpected error while delivering notification: {e}",
+                    exc_info=True,
+                )
+            finally:
+                self._next_send_at[chat_id] = time.monotonic() + self.per_chat_interval
+                if done:
+                    self._pending -= 1
+                else:
+                    chat_queue.appendleft(notification)
+                if chat_queue:
+                    self._schedule_chat(chat_id)
+                else:
+                    del self._chat_queues[chat_id]
+                if not self._pending:
+                    self._drained.set()
+
+
+def create_notification_queue(bot: Bot) -> NotificationQueue:
+    return NotificationQueue(
+        bot,
+        workers=settings.NOTIFICATION_WORKERS,
+        global_rate=settings.NOTIFICATION_GLOBAL_RPS,
+        per_chat_interval=settings.NOTIFICATION_PER_CHAT_INTERVAL_SECONDS,
+    )
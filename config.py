@@ -7,6 +7,56 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str
     ADMIN_CHAT_ID: int
     SCHEDULER_INTERVAL_MINUTES: int = 30
+    SCHEDULER_TICK_SECONDS: int = 60
+    SCHEDULER_MAX_BATCH_SIZE: int = 10
+    SCHEDULER_ADAPTIVE_POLLING: bool = True
+    SCHEDULER_MIN_INTERVAL_MINUTES: int = 10
+    SCHEDULER_MAX_INTERVAL_MINUTES: int = 240
+    SCHEDULER_RATE_SMOOTHING: float = 0.3
+    SCHEDULER_MAX_PAGES: int = 3
+    SCHEDULER_LISTING_FIRST: bool = True
+    DEVBY_LISTING_PREFILTER: bool = True
+    SCHEDULER_DEFAULT_CONCURRENCY: int = 2
+    SCHEDULER_PLATFORM_CONCURRENCY: dict[str, int] = {
+        "rabota_by": 2,
+        "habr_career": 3,
+        "dev_by": 1,
+        "belmeta_com": 2,
+        "praca_by": 2,
+    }
+    DETAIL_CACHE_TTL_MINUTES: int = 360
+    DETAIL_CACHE_MAX_SIZE: int = 5000
+    DETAIL_CACHE_PERSISTENT: bool = False
+    EXPORT_SPOOL_MAX_MEMORY_BYTES: int = 5 * 1024 * 1024
+    EXPORT_COMPRESSION: str = "zip"
+    EXPORT_COMPRESS_THRESHOLD_BYTES: int = 20 * 1024 * 1024
+    EXPORT_CONVERTER_WORKERS: int = 2
+    EXPORT_CONVERSION_CHUNK_SIZE: int = 50
+    EXPORT_CONVERSION_CACHE_SIZE: int = 10000
+    EXPORT_TOP_UP_MAX_VACANCIES: int = 10
+    NOTIFICATION_WORKERS: int = 4
+    NOTIFICATION_GLOBAL_RPS: float = 25.0
+    NOTIFICATION_PER_CHAT_INTERVAL_SECONDS: float = 1.0
+    PARSER_EXECUTOR: str = "thread"
+    PARSER_WORKERS: int = 4
+    PARSER_BACKEND: str = "lxml"
+    RATE_LIMIT_DEFAULT_RPS: float = 1.0
+    RATE_LIMIT_BURST: int = 3
+    RATE_LIMIT_MAX_CONCURRENT_PER_HOST: int = 4
+    RATE_LIMIT_HOST_RPS: dict[str, float] = {
+        "rabota.by": 0.5,
+        "habr.com": 1.0,
+        "devby.io": 0.5,
+        "belmeta.com": 1.0,
+        "praca.by": 1.0,
+    }
+    SCRAPER_MAX_ATTEMPTS: int = 3
+    SCRAPER_RETRY_BACKOFF_SECONDS: float = 5.0
+    SCRAPER_TIMEOUT_SECONDS: float = 25.0
+    SESSION_POOL_MAX_AGE_MINUTES: int = 30
+    SESSION_POOL_MAX_REQUESTS: int = 500
+    LISTING_CONDITIONAL_REQUESTS: bool = True
+    LISTING_CACHE_MAX_SIZE: int = 1000
 
 
 settings = Settings()
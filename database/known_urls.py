@@ -0,0 +1,87 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import RejectedVacancy, SkippedVacancy, Vacancy
+
+
+class KnownUrlIndex:
+    def __init__(self):
+        self._urls_by_subscription: dict[int, set[str]] = defaultdict(set)
+        self._skipped_urls: set[str] = set()
+        self.is_warm = False
+
+    async def warm_up(self, session_factory: async_sessionmaker[AsyncSession]):
+        async with session_factory() as session:
+            result = await session.stream(
+                union(
+                    select(Vacancy.subscription_id, Vacancy.url),
+                    select(RejectedVacancy.subscription_id, RejectedVacancy.url),
+                )
+            )
+            count = 0
+            async for sub_id, url in result:
+                self._urls_by_subscription[sub_id].add(url)
+                count += 1
+            result = await session.stream_scalars(select(SkippedVacancy.url))
+            async for url in result:
+                self._skipped_urls.add(url)
+        self.is_warm = True
+        logging.info(
+            f"Known URL index warmed with {count} URL(s) for "
+            f"{len(self._urls_by_subscription)} subscription(s) and "
+            f"{len(self._skipped_urls)} skipped URL(s)."
+        )
+
+    def has_urls(self, sub_id: int) -> bool:
+        return bool(self._urls_by_subscription.get(sub_id))
+
+    def add(self, sub_id: int, urls):
+        self._urls_by_subscription[sub_id].update(urls)
+
+    def is_skipped(self, url: str) -> bool:
+        return url in self._skipped_urls
+
+    def add_skipped(self, urls):
+        self._skipped_urls.update(urls)
+
+    def forget(self, sub_ids):
+        for sub_id in sub_ids:
+            self._urls_by_subscription.pop(sub_id, None)
+
+    def retain(self, sub_ids):
+        active = set(sub_ids)
+        for sub_id in list(self._urls_by_subscription):
+            if sub_id not in active:
+                del self._urls_by_subscription[sub_id]
+
+    async def filter_new(
+        self, session: AsyncSession, sub_id: int, urls: list[str]
+    ) -> list[str]:
+        known_urls = self._urls_by_subscription[sub_id]
+        candidates = [
+            url
+            for url in dict.fromkeys(urls)
+            if url and url not in known_urls and url not in self._skipped_urls
+        ]
+        if not candidates:
+            return []
+
+        query = union(
+            select(Vacancy.url).where(
+                Vacancy.subscription_id == sub_id, Vacancy.url.in_(candidates)
+            ),
+            select(RejectedVacancy.url).where(
+                RejectedVacancy.subscription_id == sub_id,
+                RejectedVacancy.url.in_(candidates),
+            ),
+        )
+        stored_urls = set((await session.execute(query)).scalars())
+        if stored_urls:
+            known_urls.update(stored_urls)
+        return [url for url in candidates if url not in stored_urls]
+
+
+known_url_index = KnownUrlIndex()
@@ -2,6 +2,8 @@ from sqlalchemy import (
     JSON,
     BigInteger,
     Column,
+    DateTime,
+    Float,
     ForeignKey,
     Integer,
     String,
@@ -37,6 +39,14 @@ class Subscription(Base):
     dork_results = relationship(
         "DorkResult", back_populates="subscription", cascade="all, delete-orphan"
     )
+    rejected_vacancies = relationship(
+        "RejectedVacancy", back_populates="subscription", cascade="all, delete-orphan"
+    )
+    pending_details = relationship(
+        "PendingVacancyDetails",
+        back_populates="subscription",
+        cascade="all, delete-orphan",
+    )
 
 
 class Vacancy(Base):
@@ -48,7 +58,9 @@ class Vacancy(Base):
     salary = Column(String)
     location = Column(String)
     description = Column(String)
-    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False)
+    subscription_id = Column(
+        Integer, ForeignKey("subscriptions.id"), nullable=False, index=True
+    )
     subscription = relationship("Subscription", back_populates="vacancies")
 
     __table_args__ = (
@@ -67,3 +79,54 @@ class DorkResult(Base):
     __table_args__ = (
         UniqueConstraint("url", "subscription_id", name="uq_dork_url_subscription"),
     )
+
+
+class RejectedVacancy(Base):
+    __tablename__ = "rejected_vacancies"
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False)
+    subscription_id = Column(
+        Integer, ForeignKey("subscriptions.id"), nullable=False, index=True
+    )
+    rejected_at = Column(DateTime, nullable=False)
+    subscription = relationship("Subscription", back_populates="rejected_vacancies")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "url", "subscription_id", name="uq_rejected_vacancy_url_subscription"
+        ),
+    )
+
+
+class PendingVacancyDetails(Base):
+    __tablename__ = "pending_vacancy_details"
+    url = Column(String, primary_key=True)
+    subscription_id = Column(
+        Integer, ForeignKey("subscriptions.id"), primary_key=True, index=True
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    subscription = relationship("Subscription", back_populates="pending_details")
+
+
+class SkippedVacancy(Base):
+    __tablename__ = "skipped_vacancies"
+    url = Column(String, primary_key=True)
+    reason = Column(String, nullable=False)
+    skipped_at = Column(DateTime, nullable=False)
+
+
+class CachedVacancyDetails(Base):
+    __tablename__ = "vacancy_detail_cache"
+    url = Column(String, primary_key=True)
+    details = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime, nullable=False, index=True)
+
+
+class SubscriptionPollState(Base):
+    __tablename__ = "subscription_poll_states"
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), primary_key=True)
+    next_check_at = Column(DateTime, nullable=False)
+    last_checked_at = Column(DateTime, nullable=True)
+    empty_streak = Column(Integer, nullable=False, default=0)
+    new_rate = Column(Float, nullable=False, default=0.0)
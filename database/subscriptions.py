@@ -0,0 +1,33 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.known_urls import known_url_index
+from database.models import (
+    DorkResult,
+    PendingVacancyDetails,
+    RejectedVacancy,
+    Subscription,
+    SubscriptionPollState,
+    Vacancy,
+)
+
+SUBSCRIPTION_DATA_MODELS = (
+    SubscriptionPollState,
+    PendingVacancyDetails,
+    RejectedVacancy,
+    Vacancy,
+    DorkResult,
+)
+
+
+async def delete_subscriptions(session: AsyncSession, *conditions) -> list[int]:
+    result = await session.execute(select(Subscription.id).where(*conditions))
+    sub_ids = list(result.scalars())
+    if not sub_ids:
+        return []
+
+    for model in SUBSCRIPTION_DATA_MODELS:
+        await session.execute(delete(model).where(model.subscription_id.in_(sub_ids)))
+    await session.execute(delete(Subscription).where(Subscription.id.in_(sub_ids)))
+    known_url_index.forget(sub_ids)
+    return sub_ids
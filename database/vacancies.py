@@ -0,0 +1,172 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import (
+    PendingVacancyDetails,
+    RejectedVacancy,
+    SkippedVacancy,
+    Vacancy,
+)
+
+INSERT_BATCH_SIZE = 500
+DETAIL_FIELDS = ("title", "company", "salary", "location", "description")
+
+
+def _insert_for_dialect(dialect_name: str):
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    raise ValueError(f"Unsupported database dialect for bulk insert: {dialect_name}")
+
+
+async def insert_new_vacancies(
+    session: AsyncSession, rows: list[dict]
+) -> set[tuple[int, str]]:
+    if not rows:
+        return set()
+
+    insert = _insert_for_dialect(session.bind.dialect.name)
+    inserted = set()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        statement = (
+            insert(Vacancy)
+            .values(rows[start : start + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=["url", "subscription_id"])
+            .returning(Vacancy.subscription_id, Vacancy.url)
+        )
+        result = await session.execute(statement)
+        inserted.update((sub_id, url) for sub_id, url in result)
+    return inserted
+
+
+async def insert_rejected_vacancies(session: AsyncSession, rows: list[dict]):
+    if not rows:
+        return
+
+    insert = _insert_for_dialect(session.bind.dialect.name)
+    rejected_at = datetime.utcnow()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        statement = (
+            insert(RejectedVacancy)
+            .values(
+                [
+                    {**row, "rejected_at": rejected_at}
+                    for row in rows[start : start + INSERT_BATCH_SIZE]
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["url", "subscription_id"])
+        )
+        await session.execute(statement)
+
+
+async def insert_skipped_vacancies(session: AsyncSession, urls: list[str], reason: str):
+    if not urls:
+        return
+
+    insert = _insert_for_dialect(session.bind.dialect.name)
+    skipped_at = datetime.utcnow()
+    for start in range(0, len(urls), INSERT_BATCH_SIZE):
+        statement = (
+            insert(SkippedVacancy)
+            .values(
+                [
+                    {"url": url, "reason": reason, "skipped_at": skipped_at}
+                    for url in urls[start : start + INSERT_BATCH_SIZE]
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["url"])
+        )
+        await session.execute(statement)
+
+
+async def insert_pending_details(session: AsyncSession, rows: list[dict]):
+    if not rows:
+        return
+
+    insert = _insert_for_dialect(session.bind.dialect.name)
+    created_at = datetime.utcnow()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        statement = (
+            insert(PendingVacancyDetails)
+            .values(
+                [
+                    {**row, "attempts": 0, "created_at": created_at}
+                    for row in rows[start : start + INSERT_BATCH_SIZE]
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["url", "subscription_id"])
+        )
+        await session.execute(statement)
+
+
+async def load_pending_subscription_ids(session: AsyncSession) -> list[int]:
+    result = await session.execute(
+        select(PendingVacancyDetails.subscription_id).distinct()
+    )
+    return list(result.scalars())
+
+
+async def load_pending_details(
+    session: AsyncSession, subscription_ids: list[int], limit: int | None = None
+) -> list[str]:
+    query = (
+        select(PendingVacancyDetails.url)
+        .where(PendingVacancyDetails.subscription_id.in_(subscription_ids))
+        .group_by(PendingVacancyDetails.url)
+        .order_by(
+            func.min(PendingVacancyDetails.attempts),
+            func.min(PendingVacancyDetails.created_at),
+        )
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return list(result.scalars())
+
+
+async def record_failed_details(
+    session: AsyncSession,
+    subscription_ids: list[int],
+    urls: list[str],
+    max_attempts: int,
+) -> int:
+    if not urls:
+        return 0
+
+    await session.execute(
+        update(PendingVacancyDetails)
+        .where(
+            PendingVacancyDetails.url.in_(urls),
+            PendingVacancyDetails.subscription_id.in_(subscription_ids),
+        )
+        .values(attempts=PendingVacancyDetails.attempts + 1)
+    )
+    result = await session.execute(
+        delete(PendingVacancyDetails).where(
+            PendingVacancyDetails.url.in_(urls),
+            PendingVacancyDetails.subscription_id.in_(subscription_ids),
+            PendingVacancyDetails.attempts >= max_attempts,
+        )
+    )
+    return result.rowcount
+
+
+async def update_vacancy_details(
+    session: AsyncSession, subscription_ids: list[int], details_by_url: dict[str, dict]
+):
+    for url, details in details_by_url.items():
+        await session.execute(
+            update(Vacancy)
+            .where(Vacancy.url == url, Vacancy.subscription_id.in_(subscription_ids))
+            .values({field: details[field] for field in DETAIL_FIELDS})
+        )
+    if details_by_url:
+        await session.execute(
+            delete(PendingVacancyDetails).where(
+                PendingVacancyDetails.url.in_(list(details_by_url)),
+                PendingVacancyDetails.subscription_id.in_(subscription_ids),
+            )
+        )
@@ -16,10 +16,16 @@ from bot.handlers import (
     subscription_handlers,
     user_commands,
 )
+from bot.description_converter import shutdown_converter_pool
+from bot.notification_queue import create_notification_queue
 from config import settings
 from database.engine import async_session_factory, engine
-from database.models import Base, User
-from scheduler import setup_scheduler
+from database.known_urls import known_url_index
+from database.models import Base, CachedVacancyDetails, User, Vacancy
+from scheduler import setup_scheduler, stop_running_groups
+from scrapers.detail_cache import detail_cache
+from scrapers.parsing import shutdown_parser_pool
+from scrapers.session_pool import session_pool
 
 
 class DbSessionMiddleware(BaseMiddleware):
@@ -35,6 +41,7 @@ class DbSessionMiddleware(BaseMiddleware):
     ) -> Any:
         async with self.session_pool() as session:
             data["session"] = session
+            data["session_factory"] = self.session_pool
             return await handler(event, data)
 
 
@@ -72,6 +79,9 @@ class AccessMiddleware(BaseMiddleware):
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for table in (Vacancy.__table__, CachedVacancyDetails.__table__):
+            for index in table.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
 
 
 async def main():
@@ -81,6 +91,8 @@ async def main():
     )
 
     await init_db()
+    await known_url_index.warm_up(async_session_factory)
+    detail_cache.bind(async_session_factory)
 
     storage: BaseStorage = MemoryStorage()
     bot = Bot(
@@ -97,13 +109,20 @@ async def main():
     dp.include_router(subscription_handlers.router)
     dp.include_router(dork_handlers.router)
 
-    scheduler = setup_scheduler(bot, async_session_factory)
+    notification_queue = create_notification_queue(bot)
+    scheduler = setup_scheduler(notification_queue, async_session_factory)
 
     try:
+        notification_queue.start()
         scheduler.start()
         await dp.start_polling(bot)
     finally:
         scheduler.shutdown()
+        await stop_running_groups()
+        await notification_queue.stop()
+        shutdown_converter_pool()
+        shutdown_parser_pool()
+        await session_pool.close()
 
 
 if __name__ == "__main__":
@@ -1,192 +1,757 @@
 import asyncio
+import hashlib
+import json
 import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from curl_cffi.requests import AsyncSession as CurlSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import selectinload
 
 from bot.keyboards import vacancy_notification_keyboard
+from bot.notification_queue import NotificationQueue
 from config import settings
-from database.models import User, Vacancy
-from scrapers.belmeta_scraper import BelmetaScraper
-from scrapers.devby_scraper import DevbyScraper
-from scrapers.habr_scraper import HabrScraper
-from scrapers.praca_scraper import PracaScraper
-from scrapers.rabota_scraper import RabotaScraper
+from database.known_urls import known_url_index
+from database.models import Subscription, SubscriptionPollState, User
+from database.vacancies import (
+    insert_new_vacancies,
+    insert_pending_details,
+    insert_rejected_vacancies,
+    insert_skipped_vacancies,
+    load_pending_details,
+    load_pending_subscription_ids,
+    record_failed_details,
+    update_vacancy_details,
+)
+from scrapers.detail_cache import detail_cache
+from scrapers.listing_cache import listing_cache
+from scrapers.request_metrics import request_metrics
+from scrapers.search_config import (
+    create_scraper,
+    get_search_config,
+    keyword_filter,
+    matches_keyword,
+)
+from scrapers.session_pool import session_pool
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+EPOCH = datetime(1970, 1, 1)
+PARAMETERLESS_SEARCH_TYPES = {"dev_by"}
+BACKFILL_BATCH_SIZE = 10
+BACKFILL_MAX_ATTEMPTS = 5
+
+_platform_semaphores: dict[str, asyncio.Semaphore] = {}
+_running_groups: dict[str, asyncio.Task] = {}
+_settled_listings: dict[str, tuple[str, tuple[int, ...]]] = {}
+
+
+def _search_fingerprint(sub: Subscription) -> str:
+    if sub.search_type in PARAMETERLESS_SEARCH_TYPES:
+        return json.dumps([sub.search_type])
+
+    city, params_for_scraper, _ = get_search_config(sub)
+    return json.dumps(
+        [sub.search_type, city, params_for_scraper],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def _notify_new_vacancy(
+    notification_queue: NotificationQueue,
+    user_id: int,
+    sub: Subscription,
+    details: dict,
+):
+    message_text = (
+        f"<b>🔔 Новая вакансия по подписке «{sub.name}»</b>\n\n"
+        f"<b><a href='{details['url']}'>{details['title']}</a></b>\n"
+        f"🏢 Компания: {details['company']}\n💰 Зарплата: {details['salary']}\n"
+        f"📍 Локация: {details['location']}\n\n<i>{details['description'][:400]}...</i>"
+    )
+    keyboard = vacancy_notification_keyboard(
+        view_url=details["url"],
+        apply_url=details["apply_url"],
+    )
+    notification_queue.enqueue(user_id, message_text, reply_markup=keyboard)
+
+
+def _listing_key(
+    scraper_instance, subscriptions: list[Subscription]
+) -> tuple[str, tuple[int, ...]] | None:
+    listing_hash = getattr(scraper_instance, "listing_hash", None)
+    if listing_hash is None:
+        return None
+    return listing_hash, tuple(sorted(sub.id for sub in subscriptions))
+
+
+def _settle_listing(fingerprint: str, listing_key: tuple | None):
+    if listing_key is not None:
+        _settled_listings[fingerprint] = listing_key
+
+
+async def _crawl_new_urls(
+    session: AsyncSession,
+    scraper_instance,
+    params_for_scraper: dict,
+    subscriptions: list[Subscription],
+    settled_key: tuple | None = None,
+) -> tuple[dict[int, list[str]], tuple | None] | None:
+    new_urls_by_sub = defaultdict(list)
+    crawled_urls = set()
+    listing_key = None
+
+    for page in range(max(1, settings.SCHEDULER_MAX_PAGES)):
+        urls_on_page, has_next_page = await scraper_instance.get_vacancy_urls_from_page(
+            params_for_scraper, page=page
+        )
+
+        if (
+            hasattr(scraper_instance, "captcha_detected_in_session")
+            and scraper_instance.captcha_detected_in_session
+        ):
+            logging.error(
+                f"CAPTCHA detected on page {page} for search shared by "
+                f"{len(subscriptions)} subscription(s) (first: '{subscriptions[0].name}')."
+            )
+            if page == 0:
+                return None
+            break
+
+        if urls_on_page is None:
+            if page == 0:
+                return None
+            break
+
+        if page == 0:
+            listing_key = _listing_key(scraper_instance, subscriptions)
+            if listing_key is not None and listing_key == settled_key:
+                logging.info(
+                    f"First page of search '{subscriptions[0].name}' is unchanged "
+                    f"since the last complete check. Skipping the diff."
+                )
+                return {}, listing_key
+
+        page_urls = [
+            url
+            for url in dict.fromkeys(urls_on_page)
+            if url and url not in crawled_urls
+        ]
+        if not page_urls:
+            break
+        crawled_urls.update(page_urls)
+
+        page_is_unseen = False
+        for sub in subscriptions:
+            has_history = known_url_index.has_urls(sub.id)
+            new_urls = await known_url_index.filter_new(session, sub.id, page_urls)
+            new_urls_by_sub[sub.id].extend(new_urls)
+            if has_history and len(new_urls) == len(page_urls):
+                page_is_unseen = True
+
+        if not has_next_page or not page_is_unseen:
+            break
+        logging.info(
+            f"Page {page} of search '{subscriptions[0].name}' has only unseen "
+            f"vacancies. Requesting the next page..."
+        )
+
+    new_urls_by_sub = {sub_id: urls for sub_id, urls in new_urls_by_sub.items() if urls}
+    return new_urls_by_sub, listing_key
+
+
+def _prefilter_by_card_text(
+    scraper_instance,
+    subscriptions: list[Subscription],
+    new_urls_by_sub: dict[int, list[str]],
+) -> list[dict]:
+    card_texts = getattr(scraper_instance, "card_texts", {})
+    rejected_rows = []
+    for sub in subscriptions:
+        keyword = keyword_filter(sub)
+        if not keyword or sub.id not in new_urls_by_sub:
+            continue
+
+        kept_urls = []
+        for url in new_urls_by_sub[sub.id]:
+            card_text = card_texts.get(url)
+            if card_text is None or keyword in card_text.lower():
+                kept_urls.append(url)
+            else:
+                rejected_rows.append({"url": url, "subscription_id": sub.id})
+
+        if kept_urls:
+            new_urls_by_sub[sub.id] = kept_urls
+        else:
+            del new_urls_by_sub[sub.id]
+    return rejected_rows
+
+
+async def _record_rejected(session: AsyncSession, rejected_rows: list[dict]):
+    if not rejected_rows:
+        return
+
+    await insert_rejected_vacancies(session, rejected_rows)
+    await session.commit()
+    for row in rejected_rows:
+        known_url_index.add(row["subscription_id"], [row["url"]])
+    logging.info(f"Recorded {len(rejected_rows)} vacancies rejected by keyword filter.")
+
+
+async def _record_redirects(session: AsyncSession, scraper_instance):
+    redirect_urls = [
+        url
+        for url in getattr(scraper_instance, "redirect_urls", ())
+        if not known_url_index.is_skipped(url)
+    ]
+    if not redirect_urls:
+        return
+
+    await insert_skipped_vacancies(session, redirect_urls, reason="redirect")
+    await session.commit()
+    known_url_index.add_skipped(redirect_urls)
+    logging.info(f"Added {len(redirect_urls)} aggregator redirect(s) to the skip-list.")
+
+
+async def _fetch_details(
+    scraper_instance, urls: list[str], search_name: str
+) -> dict[str, dict | None]:
+    details_by_url = {}
+    for url in urls:
+        if (
+            hasattr(scraper_instance, "captcha_detected_in_session")
+            and scraper_instance.captcha_detected_in_session
+        ):
+            logging.error(
+                f"CAPTCHA detected during details scraping. Aborting for search '{search_name}'."
+            )
+            break
+        details_by_url[url] = await detail_cache.get_or_fetch(scraper_instance, url)
+    return details_by_url
+
+
+async def _backfill_pending_details(
+    session: AsyncSession,
+    scraper_instance,
+    subscriptions: list[Subscription],
+    limit: int,
+) -> int:
+    search_name = subscriptions[0].name
+    subscription_ids = [sub.id for sub in subscriptions]
+    urls = []
+    try:
+        urls = await load_pending_details(session, subscription_ids, limit=limit)
+        if not urls:
+            return 0
+
+        logging.info(
+            f"Fetching full details for {len(urls)} vacancies announced from the "
+            f"listing of search '{search_name}'..."
+        )
+        details_by_url = await _fetch_details(scraper_instance, urls, search_name)
+        fetched = {url: details for url, details in details_by_url.items() if details}
+        failed_urls = [url for url, details in details_by_url.items() if not details]
+        await update_vacancy_details(session, subscription_ids, fetched)
+        dropped = await record_failed_details(
+            session, subscription_ids, failed_urls, BACKFILL_MAX_ATTEMPTS
+        )
+        await session.commit()
+        logging.info(
+            f"Backfilled details for {len(fetched)} of {len(urls)} vacancies of "
+            f"search '{search_name}', {len(failed_urls)} failed, {dropped} given up."
+        )
+    except Exception as e:
+        logging.error(
+            f"Could not backfill vacancy details for search '{search_name}': {e}",
+            exc_info=True,
+        )
+        await session.rollback()
+    return len(urls)
+
+
+async def _process_search_group(
+    notification_queue: NotificationQueue,
+    session: AsyncSession,
+    subscriptions: list[Subscription],
+) -> dict[int, int] | None:
+    first_sub = subscriptions[0]
+    city, params_for_scraper, _ = get_search_config(first_sub)
+    scraper_instance = create_scraper(first_sub.search_type, city)
+    if not scraper_instance:
+        return None
+
+    return await _save_new_vacancies(
+        notification_queue, session, scraper_instance, params_for_scraper, subscriptions
+    )
+
+
+async def _save_new_vacancies(
+    notification_queue: NotificationQueue,
+    session: AsyncSession,
+    scraper_instance,
+    params_for_scraper: dict,
+    subscriptions: list[Subscription],
+) -> dict[int, int] | None:
+    first_sub = subscriptions[0]
+    fingerprint = _search_fingerprint(first_sub)
+    crawl = await _crawl_new_urls(
+        session,
+        scraper_instance,
+        params_for_scraper,
+        subscriptions,
+        _settled_listings.pop(fingerprint, None),
+    )
+    if crawl is None:
+        return None
+    new_urls_by_sub, listing_key = crawl
+
+    await _record_redirects(session, scraper_instance)
+    new_counts = {sub.id: 0 for sub in subscriptions}
+
+    if settings.DEVBY_LISTING_PREFILTER:
+        await _record_rejected(
+            session,
+            _prefilter_by_card_text(scraper_instance, subscriptions, new_urls_by_sub),
+        )
+
+    for sub in subscriptions:
+        if sub.id not in new_urls_by_sub:
+            logging.info(
+                f"No new vacancies for sub '{sub.name}' of user {sub.user_id}."
+            )
+
+    if not new_urls_by_sub:
+        _settle_listing(fingerprint, listing_key)
+        return new_counts
+
+    urls_to_scrape = list(
+        dict.fromkeys(url for urls in new_urls_by_sub.values() for url in urls)
+    )
+    summaries = {}
+    if settings.SCHEDULER_LISTING_FIRST:
+        summaries = getattr(scraper_instance, "vacancy_summaries", {})
+    listed_urls = [url for url in urls_to_scrape if url in summaries]
+    urls_to_fetch = [url for url in urls_to_scrape if url not in summaries]
+    logging.info(
+        f"Found {len(urls_to_scrape)} new vacancies for {len(new_urls_by_sub)} "
+        f"subscription(s) sharing search '{first_sub.name}'. "
+        f"Scraping details for {len(urls_to_fetch)} of them..."
+    )
+    details_by_url = {url: summaries[url] for url in listed_urls}
+    details_by_url.update(
+        await _fetch_details(scraper_instance, urls_to_fetch, first_sub.name)
+    )
+
+    await _record_redirects(session, scraper_instance)
+    if not all(details_by_url.get(url) for url in urls_to_scrape):
+        listing_key = None
+
+    rows = []
+    rejected_rows = []
+    details_by_key = {}
+    for sub in subscriptions:
+        if sub.id not in new_urls_by_sub:
+            continue
+
+        keyword = keyword_filter(sub)
+        for url in new_urls_by_sub[sub.id]:
+            details = details_by_url.get(url)
+            if not details:
+                continue
+
+            if keyword and not matches_keyword(keyword, details):
+                rejected_rows.append({"url": url, "subscription_id": sub.id})
+                continue
+
+            rows.append(
+                {
+                    "url": details["url"],
+                    "title": details["title"],
+                    "company": details["company"],
+                    "salary": details["salary"],
+                    "location": details["location"],
+                    "description": details["description"],
+                    "subscription_id": sub.id,
+                }
+            )
+            details_by_key[(sub.id, details["url"])] = details
+
+    await _record_rejected(session, rejected_rows)
+    if not rows:
+        _settle_listing(fingerprint, listing_key)
+        return new_counts
+
+    inserted = await insert_new_vacancies(session, rows)
+    listed_url_set = set(listed_urls)
+    await insert_pending_details(
+        session,
+        [
+            {"url": url, "subscription_id": sub_id}
+            for sub_id, url in inserted
+            if url in listed_url_set
+        ],
+    )
+    await session.commit()
+
+    for sub in subscriptions:
+        saved_urls = [
+            row["url"]
+            for row in rows
+            if row["subscription_id"] == sub.id and (sub.id, row["url"]) in inserted
+        ]
+        if not saved_urls:
+            continue
+
+        known_url_index.add(sub.id, saved_urls)
+        new_counts[sub.id] = len(saved_urls)
+        for url in saved_urls:
+            _notify_new_vacancy(
+                notification_queue, sub.user_id, sub, details_by_key[(sub.id, url)]
+            )
+        logging.info(
+            f"Successfully processed and saved {len(saved_urls)} new vacancies for '{sub.name}'."
+        )
+
+    _settle_listing(fingerprint, listing_key)
+    return new_counts
+
+
+def _next_slot_time(fingerprint: str, after: datetime) -> datetime:
+    interval_seconds = settings.SCHEDULER_INTERVAL_MINUTES * 60
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+    offset = int(digest, 16) % interval_seconds
+    elapsed = (after - EPOCH).total_seconds() - offset
+    next_slot = (int(elapsed // interval_seconds) + 1) * interval_seconds + offset
+    return EPOCH + timedelta(seconds=next_slot)
+
+
+def _next_due_time(
+    subscriptions: list[Subscription],
+    poll_states: dict[int, SubscriptionPollState],
+) -> datetime | None:
+    due_times = [
+        poll_states[sub.id].next_check_at
+        for sub in subscriptions
+        if sub.id in poll_states
+    ]
+    return min(due_times) if due_times else None
+
+
+async def _schedule_new_subscriptions(
+    session: AsyncSession,
+    search_groups: dict[str, list[Subscription]],
+    poll_states: dict[int, SubscriptionPollState],
+    now: datetime,
+):
+    scheduled_count = 0
+    for fingerprint, subscriptions in search_groups.items():
+        for sub in subscriptions:
+            if sub.id in poll_states:
+                continue
+            state = SubscriptionPollState(
+                subscription_id=sub.id,
+                next_check_at=_next_slot_time(fingerprint, now),
+                empty_streak=0,
+                new_rate=0.0,
+            )
+            session.add(state)
+            poll_states[sub.id] = state
+            scheduled_count += 1
+
+    if scheduled_count:
+        await session.commit()
+        logging.info(f"Scheduled first check for {scheduled_count} subscription(s).")
+
+
+async def _prune_orphaned_poll_states(
+    session: AsyncSession,
+    search_groups: dict[str, list[Subscription]],
+    poll_states: dict[int, SubscriptionPollState],
+):
+    active_ids = {
+        sub.id for subscriptions in search_groups.values() for sub in subscriptions
+    }
+    orphaned_ids = [sub_id for sub_id in poll_states if sub_id not in active_ids]
+    if not orphaned_ids:
+        return
+
+    await session.execute(
+        delete(SubscriptionPollState).where(
+            SubscriptionPollState.subscription_id.in_(orphaned_ids)
+        )
+    )
+    await session.commit()
+    for sub_id in orphaned_ids:
+        del poll_states[sub_id]
+    logging.info(
+        f"Removed polling state of {len(orphaned_ids)} deleted subscription(s)."
+    )
+
+
+def _next_check_interval(state: SubscriptionPollState) -> timedelta:
+    minutes = (
+        settings.SCHEDULER_INTERVAL_MINUTES
+        * 2 ** min(state.empty_streak, 6)
+        / (1 + state.new_rate)
+    )
+    minutes = min(
+        max(minutes, settings.SCHEDULER_MIN_INTERVAL_MINUTES),
+        settings.SCHEDULER_MAX_INTERVAL_MINUTES,
+    )
+    return timedelta(minutes=minutes)
+
+
+async def _update_poll_states(
+    session: AsyncSession,
+    subscriptions: list[Subscription],
+    new_counts: dict[int, int] | None,
+):
+    now = datetime.utcnow()
+    alpha = settings.SCHEDULER_RATE_SMOOTHING
+    next_slot = _next_slot_time(_search_fingerprint(subscriptions[0]), now)
+    for sub in subscriptions:
+        state = await session.get(SubscriptionPollState, sub.id)
+        if state is None:
+            state = SubscriptionPollState(
+                subscription_id=sub.id, empty_streak=0, new_rate=0.0
+            )
+            session.add(state)
+
+        if new_counts is None:
+            state.next_check_at = next_slot
+            continue
+
+        count = new_counts.get(sub.id, 0)
+        state.new_rate = alpha * count + (1 - alpha) * state.new_rate
+        state.empty_streak = 0 if count else state.empty_streak + 1
+        state.last_checked_at = now
+        if settings.SCHEDULER_ADAPTIVE_POLLING:
+            state.next_check_at = now + _next_check_interval(state)
+        else:
+            state.next_check_at = next_slot
+
+    await session.commit()
+
+
+async def _run_search_group(
+    notification_queue: NotificationQueue,
+    session_factory: async_sessionmaker[AsyncSession],
+    subscriptions: list[Subscription],
+    semaphore: asyncio.Semaphore,
+):
+    async with semaphore:
+        async with session_factory() as session:
+            new_counts = None
+            try:
+                new_counts = await _process_search_group(
+                    notification_queue, session, subscriptions
+                )
+            except Exception as e:
+                logging.error(
+                    f"An error occurred while processing search '{subscriptions[0].name}': {e}",
+                    exc_info=True,
+                )
+                await session.rollback()
+
+            try:
+                await _update_poll_states(session, subscriptions, new_counts)
+            except Exception as e:
+                logging.error(
+                    f"Could not update polling state for search '{subscriptions[0].name}': {e}"
+                )
+                await session.rollback()
+
+
+def _get_platform_semaphore(search_type: str) -> asyncio.Semaphore:
+    if search_type not in _platform_semaphores:
+        limit = settings.SCHEDULER_PLATFORM_CONCURRENCY.get(
+            search_type, settings.SCHEDULER_DEFAULT_CONCURRENCY
+        )
+        _platform_semaphores[search_type] = asyncio.Semaphore(max(1, limit))
+    return _platform_semaphores[search_type]
+
+
+async def _finish_cycle():
+    try:
+        await detail_cache.prune_expired()
+    except Exception as e:
+        logging.error(f"Could not prune the persistent detail cache: {e}")
+
+    request_metrics.log_summary()
+    session_pool.log_summary()
+    listing_cache.log_summary()
+    logging.info("Scheduler job finished.")
+
+
+async def _run_tracked_group(
+    fingerprint: str,
+    notification_queue: NotificationQueue,
+    session_factory: async_sessionmaker[AsyncSession],
+    subscriptions: list[Subscription],
+):
+    try:
+        await _run_search_group(
+            notification_queue,
+            session_factory,
+            subscriptions,
+            _get_platform_semaphore(subscriptions[0].search_type),
+        )
+    finally:
+        _running_groups.pop(fingerprint, None)
+    if not _running_groups:
+        await _finish_cycle()
+
+
+async def _backfill_platform(
+    session_factory: async_sessionmaker[AsyncSession],
+    search_groups: list[list[Subscription]],
+):
+    budget = BACKFILL_BATCH_SIZE
+    for subscriptions in search_groups:
+        first_sub = subscriptions[0]
+        city, _, _ = get_search_config(first_sub)
+        scraper_instance = create_scraper(first_sub.search_type, city)
+        if not scraper_instance:
+            continue
+
+        async with session_factory() as session:
+            budget -= await _backfill_pending_details(
+                session, scraper_instance, subscriptions, budget
+            )
+        if budget <= 0:
+            break
+
+
+async def backfill_pending_details(
+    session_factory: async_sessionmaker[AsyncSession],
+):
+    async with session_factory() as session:
+        subscription_ids = await load_pending_subscription_ids(session)
+        if not subscription_ids:
+            return
+        result = await session.execute(
+            select(Subscription).where(Subscription.id.in_(subscription_ids))
+        )
+        subscriptions = result.scalars().all()
+
+    search_groups = defaultdict(list)
+    for sub in subscriptions:
+        search_groups[_search_fingerprint(sub)].append(sub)
+
+    groups_by_platform = defaultdict(list)
+    for fingerprint, group in search_groups.items():
+        if fingerprint not in _running_groups:
+            groups_by_platform[group[0].search_type].append(group)
+
+    await asyncio.gather(
+        *[
+            _backfill_platform(session_factory, groups)
+            for groups in groups_by_platform.values()
+        ]
+    )
+
+
+async def stop_running_groups():
+    tasks = list(_running_groups.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _running_groups.clear()
+
 
 async def check_for_updates(
-    bot: Bot, session_factory: async_sessionmaker[AsyncSession]
+    notification_queue: NotificationQueue,
+    session_factory: async_sessionmaker[AsyncSession],
 ):
-    logging.info("Scheduler job started: Checking for new items...")
+    running_at_start = set(_running_groups)
     async with session_factory() as session:
         query = select(User).options(selectinload(User.subscriptions))
         result = await session.execute(query)
         users_with_subscriptions = result.scalars().all()
+        poll_states_result = await session.execute(select(SubscriptionPollState))
+        poll_states = {
+            state.subscription_id: state for state in poll_states_result.scalars()
+        }
 
         if not users_with_subscriptions:
-            logging.info("No users with subscriptions found. Skipping check.")
             return
 
-        async with CurlSession() as curl_session:
-            for user in users_with_subscriptions:
-                if not user.subscriptions:
-                    continue
-
-                logging.info(f"Checking subscriptions for user {user.telegram_id}...")
-                for sub in user.subscriptions:
-                    try:
-                        scraper_instance = None
-                        params_for_scraper = {}
-                        keyword = None
-
-                        if sub.search_type == "rabota_by":
-                            search_config = sub.search_params
-                            city = search_config.get("city", "minsk")
-                            params_for_scraper = search_config.get("params", {})
-                            keyword = params_for_scraper.get("text", "").lower()
-                            scraper_instance = RabotaScraper(city=city)
-                        elif sub.search_type == "habr_career":
-                            params_for_scraper = sub.search_params
-                            keyword = params_for_scraper.get("q", "").lower()
-                            scraper_instance = HabrScraper()
-                        elif sub.search_type == "dev_by":
-                            params_for_scraper = {}
-                            keyword = sub.search_params.get("q", "").lower()
-                            scraper_instance = DevbyScraper()
-                        elif sub.search_type == "belmeta_com":
-                            params_for_scraper = sub.search_params
-                            keyword = params_for_scraper.get("q", "").lower()
-                            scraper_instance = BelmetaScraper()
-                        elif sub.search_type == "praca_by":
-                            params_for_scraper = sub.search_params
-                            keyword = params_for_scraper.get("query", "").lower()
-                            scraper_instance = PracaScraper()
-
-                        if not scraper_instance:
-                            continue
-
-                        known_urls_query = select(Vacancy.url).where(
-                            Vacancy.subscription_id == sub.id
-                        )
-                        known_urls_result = await session.execute(known_urls_query)
-                        known_urls = {url for (url,) in known_urls_result}
-
-                        (
-                            urls_on_page,
-                            _,
-                        ) = await scraper_instance.get_vacancy_urls_from_page(
-                            curl_session, params_for_scraper, page=0
-                        )
-
-                        if (
-                            hasattr(scraper_instance, "captcha_detected_in_session")
-                            and scraper_instance.captcha_detected_in_session
-                        ):
-                            logging.error(
-                                f"CAPTCHA detected for sub '{sub.name}'. Skipping."
-                            )
-                            continue
-
-                        if urls_on_page is None:
-                            continue
-
-                        new_urls = [
-                            url for url in urls_on_page if url and url not in known_urls
-                        ]
-                        if not new_urls:
-                            logging.info(
-                                f"No new vacancies for sub '{sub.name}' of user {user.telegram_id}."
-                            )
-                            continue
-
-                        logging.info(
-                            f"Found {len(new_urls)} new vacancies for '{sub.name}'. Scraping details..."
-                        )
-                        processed_count = 0
-                        for url in new_urls:
-                            if (
-                                hasattr(scraper_instance, "captcha_detected_in_session")
-                                and scraper_instance.captcha_detected_in_session
-                            ):
-                                logging.error(
-                                    f"CAPTCHA detected during details scraping. Aborting for sub '{sub.name}'."
-                                )
-                                break
-
-                            details = await scraper_instance.scrape_vacancy_details(
-                                curl_session, url
-                            )
-                            if details:
-                                if sub.search_type == "dev_by" and keyword:
-                                    title_lower = details.get("title", "").lower()
-                                    desc_lower = details.get("description", "").lower()
-                                    if (
-                                        keyword not in title_lower
-                                        and keyword not in desc_lower
-                                    ):
-                                        continue
-
-                                new_vacancy = Vacancy(
-                                    url=details["url"],
-                                    title=details["title"],
-                                    company=details["company"],
-                                    salary=details["salary"],
-                                    location=details["location"],
-                                    description=details["description"],
-                                    subscription_id=sub.id,
-                                )
-                                session.add(new_vacancy)
-                                processed_count += 1
-                                message_text = (
-                                    f"<b>🔔 Новая вакансия по подписке «{sub.name}»</b>\n\n"
-                                    f"<b><a href='{details['url']}'>{details['title']}</a></b>\n"
-                                    f"🏢 Компания: {details['company']}\n💰 Зарплата: {details['salary']}\n"
-                                    f"📍 Локация: {details['location']}\n\n<i>{details['description'][:400]}...</i>"
-                                )
-                                keyboard = vacancy_notification_keyboard(
-                                    view_url=details["url"],
-                                    apply_url=details["apply_url"],
-                                )
-                                await bot.send_message(
-                                    user.telegram_id,
-                                    message_text,
-                                    reply_markup=keyboard,
-                                    disable_web_page_preview=True,
-                                )
-                                await asyncio.sleep(1)
-
-                        if processed_count > 0:
-                            await session.commit()
-                            logging.info(
-                                f"Successfully processed and saved {processed_count} new vacancies for '{sub.name}'."
-                            )
-
-                    except Exception as e:
-                        logging.error(
-                            f"An error occurred while processing subscription '{sub.name}' for user {user.telegram_id}: {e}",
-                            exc_info=True,
-                        )
-                        await session.rollback()
+        search_groups = defaultdict(list)
+        for user in users_with_subscriptions:
+            for sub in user.subscriptions:
+                search_groups[_search_fingerprint(sub)].append(sub)
 
-    logging.info("Scheduler job finished.")
+        now = datetime.utcnow()
+        await _prune_orphaned_poll_states(session, search_groups, poll_states)
+        await _schedule_new_subscriptions(session, search_groups, poll_states, now)
+
+    if not known_url_index.is_warm:
+        await known_url_index.warm_up(session_factory)
+
+    known_url_index.retain(
+        sub.id for subscriptions in search_groups.values() for sub in subscriptions
+    )
+    for fingerprint in list(_settled_listings):
+        if fingerprint not in search_groups:
+            del _settled_listings[fingerprint]
+
+    due_groups = []
+    for fingerprint, subscriptions in search_groups.items():
+        if fingerprint in running_at_start or fingerprint in _running_groups:
+            continue
+        due_time = _next_due_time(subscriptions, poll_states)
+        if due_time is not None and due_time <= now:
+            due_groups.append((due_time, fingerprint, subscriptions))
+    if not due_groups:
+        return
+
+    due_groups.sort(key=lambda item: item[0])
+    batch = due_groups[: settings.SCHEDULER_MAX_BATCH_SIZE]
+    total_subscriptions = sum(len(subs) for _, _, subs in batch)
+    logging.info(
+        f"Starting checks for {total_subscriptions} subscription(s) grouped into "
+        f"{len(batch)} distinct search(es) "
+        f"({len(due_groups) - len(batch)} more due, "
+        f"{len(_running_groups)} still running)..."
+    )
+
+    for _, fingerprint, subscriptions in batch:
+        _running_groups[fingerprint] = asyncio.create_task(
+            _run_tracked_group(
+                fingerprint, notification_queue, session_factory, subscriptions
+            ),
+            name=f"search-group-{subscriptions[0].id}",
+        )
 
 
 def setup_scheduler(
-    bot: Bot, session_factory: async_sessionmaker[AsyncSession]
+    notification_queue: NotificationQueue,
+    session_factory: async_sessionmaker[AsyncSession],
 ) -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler(timezone="Europe/Minsk")
     scheduler.add_job(
         check_for_updates,
         "interval",
-        minutes=settings.SCHEDULER_INTERVAL_MINUTES,
-        kwargs={"bot": bot, "session_factory": session_factory},
+        seconds=settings.SCHEDULER_TICK_SECONDS,
+        max_instances=1,
+        coalesce=True,
+        kwargs={
+            "notification_queue": notification_queue,
+            "session_factory": session_factory,
+        },
+    )
+    scheduler.add_job(
+        backfill_pending_details,
+        "interval",
+        seconds=settings.SCHEDULER_TICK_SECONDS,
+        max_instances=1,
+        coalesce=True,
+        kwargs={"session_factory": session_factory},
     )
     return scheduler
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from curl_cffi.requests import RequestsError, Response
+
+from config import settings
+from scrapers.listing_cache import ListingEntry, listing_cache
+from scrapers.parsing import run_parser
+from scrapers.rate_limiter import rate_limiter
+from scrapers.request_metrics import request_metrics
+from scrapers.session_pool import session_pool
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BaseScraper:
+    name = "scraper"
+    impersonate = "chrome136"
+    blocked_marker: str | None = None
+    listing_region: tuple[bytes, bytes | None] | None = None
+    listing_as_bytes = False
+
+    def __init__(self):
+        self.headers = dict(DEFAULT_HEADERS)
+        self.captcha_detected_in_session = False
+        self.listing_hash: str | None = None
+        self.debug_dir = "debug/failed_pages"
+        os.makedirs(self.debug_dir, exist_ok=True)
+
+    def _get_text(self, element, default="N/A"):
+        return element.text.strip().replace("\xa0", " ") if element else default
+
+    def _save_failed_page(self, url: str, content: str):
+        if not content:
+            return
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            page_id = re.sub(r"\W+", "_", url.split("://", 1)[-1]).strip("_")[-80:]
+            filename = os.path.join(
+                self.debug_dir, f"{self.name}_failed_{page_id}_{timestamp}.html"
+            )
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(content)
+            logging.info(f"Saved problematic HTML to {filename}")
+        except Exception as e:
+            logging.error(f"Could not save failed page HTML for {url}: {e}")
+
+    def _is_blocked(self, response: Response) -> bool:
+        return bool(self.blocked_marker) and self.blocked_marker in response.text
+
+    async def _backoff(self, full_url: str, attempt: int, attempts: int):
+        delay = settings.SCRAPER_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+        delay = random.uniform(delay / 2, delay)
+        logging.warning(
+            f"Retrying {full_url} in {delay:.1f} seconds... (Attempt {attempt + 1}/{attempts})"
+        )
+        await asyncio.sleep(delay)
+
+    async def _make_request(
+        self, url: str, params: dict = None, extra_headers: dict | None = None
+    ) -> Response | None:
+        full_url = url
+        if params:
+            full_url += "?" + urlencode(params, doseq=True)
+        host = rate_limiter.host_key(url)
+        attempts = max(1, settings.SCRAPER_MAX_ATTEMPTS)
+        blocked_response = None
+
+        for attempt in range(attempts):
+            if attempt:
+                request_metrics.record_retry(host)
+                await self._backoff(full_url, attempt, attempts)
+
+            logging.info(f"Requesting URL: {full_url}")
+            try:
+                async with rate_limiter.limit(url):
+                    started_at = time.monotonic()
+                    response = await session_pool.get(
+                        url,
+                        self.impersonate,
+                        params=params,
+                        headers={**self.headers, **(extra_headers or {})},
+                        timeout=settings.SCRAPER_TIMEOUT_SECONDS,
+                    )
+            except RequestsError as e:
+                request_metrics.record_failure(host)
+                logging.error(
+                    f"Request failed on attempt {attempt + 1} for {full_url}: {e}"
+                )
+                continue
+
+            request_metrics.record_response(
+                host, time.monotonic() - started_at, len(response.content)
+            )
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                request_metrics.record_failure(host)
+                logging.warning(
+                    f"Got HTTP {response.status_code} on attempt {attempt + 1} for {full_url}."
+                )
+                continue
+            if response.status_code >= 400:
+                request_metrics.record_failure(host)
+                logging.error(
+                    f"Request failed for {full_url}: HTTP {response.status_code}"
+                )
+                return None
+            if self._is_blocked(response):
+                request_metrics.record_blocked(host)
+                blocked_response = response
+                logging.warning(
+                    f"CAPTCHA detected on attempt {attempt + 1} for {full_url}."
+                )
+                continue
+            return response
+
+        if blocked_response is not None:
+            self.captcha_detected_in_session = True
+            self._save_failed_page(url, blocked_response.text)
+        logging.error(f"Giving up on {full_url} after {attempts} attempts.")
+        return None
+
+    def _listing_hash(self, content: bytes) -> str:
+        region = content
+        if self.listing_region:
+            start_marker, end_marker = self.listing_region
+            start = content.find(start_marker)
+            if start != -1:
+                end = content.find(end_marker, start) if end_marker else -1
+                region = content[start : end if end != -1 else len(content)]
+        return hashlib.sha1(region).hexdigest()
+
+    async def _fetch_listing(
+        self, url: str, parse: Callable, params: dict = None
+    ) -> tuple[bool, Any]:
+        key = url + ("?" + urlencode(params, doseq=True) if params else "")
+        entry = None
+        extra_headers = {}
+        if settings.LISTING_CONDITIONAL_REQUESTS:
+            entry = listing_cache.get(key)
+        if entry is not None and entry.etag:
+            extra_headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            extra_headers["If-Modified-Since"] = entry.last_modified
+
+        self.listing_hash = None
+        response = await self._make_request(url, params, extra_headers)
+        if response is None:
+            return False, None
+        if response.status_code == 304 and entry is not None:
+            listing_cache.not_modified += 1
+            logging.info(f"Listing {key} not modified since the last check.")
+            self.listing_hash = entry.content_hash
+            return True, entry.parsed
+
+        content_hash = self._listing_hash(response.content)
+        self.listing_hash = content_hash
+        if entry is not None and entry.content_hash == content_hash:
+            listing_cache.unchanged += 1
+            logging.info(f"Listing {key} unchanged since the last check.")
+            parsed = entry.parsed
+        else:
+            listing_cache.changed += 1
+            content = response.content if self.listing_as_bytes else response.text
+            parsed = await run_parser(parse, content)
+
+        if parsed is not None and settings.LISTING_CONDITIONAL_REQUESTS:
+            listing_cache.set(
+                key,
+                ListingEntry(
+                    content_hash=content_hash,
+                    parsed=parsed,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ),
+            )
+        return True, parsed
@@ -1,169 +1,161 @@
 import asyncio
 import logging
-import os
 import random
-from datetime import datetime
-from urllib.parse import urlencode, urljoin
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from curl_cffi.requests import AsyncSession, RequestsError, Response
+from scrapers.base_scraper import BaseScraper
+from scrapers.detail_cache import detail_cache
+from scrapers.html_parser import Selector, has_class, parsed_document
+from scrapers.parsing import run_parser
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+CARD = Selector("article.job", f"//article[{has_class('job')}]")
+CARD_TITLE_LINK = Selector(
+    "h2.title a.job-title",
+    f".//h2[{has_class('title')}]//a[{has_class('job-title')}]",
+)
+NEXT_PAGE = Selector(
+    ".pager .next", f"//*[{has_class('pager')}]//*[{has_class('next')}]"
+)
+REDIRECT_LINK = Selector('a[href*="/jrd?"]', './/a[contains(@href, "/jrd?")]')
+TITLE = Selector("h1", "//h1")
+COMPANY = Selector(".company-wrap", f"//*[{has_class('company-wrap')}]")
+SALARY = Selector(
+    "td.name.salary + td.value",
+    f"//td[{has_class('name')}][{has_class('salary')}]"
+    f"/following-sibling::*[1][self::td][{has_class('value')}]",
+)
+LOCATION = Selector("#spnLocation", '//*[@id="spnLocation"]')
+DESCRIPTION = Selector("div.description", f"//div[{has_class('description')}]")
+
+
+class BelmetaScraper(BaseScraper):
+    name = "belmeta"
+    listing_region = (b'<article class="job', b"<footer")
 
-class BelmetaScraper:
     def __init__(self):
+        super().__init__()
         self.base_url = "https://belmeta.com"
         self.search_url = f"{self.base_url}/vacansii"
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        }
-        self.semaphore = asyncio.Semaphore(5)
-        self.captcha_detected_in_session = False
-        self.debug_dir = "debug/failed_pages"
-        os.makedirs(self.debug_dir, exist_ok=True)
+        self.redirect_urls: set[str] = set()
+
+    @parsed_document
+    def _parse_search_page(self, document) -> tuple[list[str], list[str], bool]:
+        urls = []
+        redirect_urls = []
+        for card in document.select(CARD):
+            for link in card.select(CARD_TITLE_LINK):
+                url = urljoin(self.base_url, link["href"])
+                if card.select_one(REDIRECT_LINK):
+                    redirect_urls.append(url)
+                else:
+                    urls.append(url)
+        if not urls and not redirect_urls:
+            return [], [], False
+
+        has_next_page = document.select_one(NEXT_PAGE) is not None
+        return urls, redirect_urls, has_next_page
+
+    @parsed_document
+    def _parse_vacancy_details(self, document, url: str) -> dict | None:
+        if document.select_one(REDIRECT_LINK):
+            return None
 
-    def _get_text(self, element, default="N/A"):
-        return element.text.strip().replace("\xa0", " ") if element else default
+        title = self._get_text(document.select_one(TITLE))
+        company = self._get_text(document.select_one(COMPANY))
 
-    def _save_failed_page(self, url: str, content: str):
-        if not content:
-            return
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            page_id = url.split("?id=")[-1].split("&")[0]
-            filename = os.path.join(
-                self.debug_dir, f"belmeta_failed_{page_id}_{timestamp}.html"
-            )
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(content)
-            logging.info(f"Saved problematic HTML to {filename}")
-        except Exception as e:
-            logging.error(f"Could not save failed page HTML for {url}: {e}")
+        salary_element = document.select_one(SALARY)
+        salary = self._get_text(salary_element, default="не указана")
 
-    async def _make_request(
-        self, session: AsyncSession, url: str, params: dict = None
-    ) -> Response | None:
-        try:
-            full_url = url
-            if params:
-                full_url += "?" + urlencode(params, doseq=True)
-            logging.info(f"Requesting URL: {full_url}")
-            response = await session.get(
-                url,
-                params=params,
-                headers=self.headers,
-                impersonate="chrome136",
-                timeout=25,
-            )
-            response.raise_for_status()
-            return response
-        except RequestsError as e:
-            logging.error(f"Request failed for {url} with params {params}: {e}")
-            return None
+        location_element = document.select_one(LOCATION)
+        location = self._get_text(location_element, default="не указана")
+
+        description_tag = document.select_one(DESCRIPTION)
+        description = description_tag.html if description_tag else "N/A"
+
+        return {
+            "url": url,
+            "apply_url": url,
+            "title": title,
+            "salary": salary,
+            "company": company,
+            "location": location,
+            "description": description.strip(),
+        }
 
     async def get_vacancy_urls_from_page(
-        self, session: AsyncSession, params: dict, page: int = 0
+        self, params: dict, page: int = 0
     ) -> tuple[list[str] | None, bool]:
         current_params = params.copy()
         if page > 0:
             current_params["page"] = page + 1
 
-        response = await self._make_request(
-            session, self.search_url, params=current_params
+        ok, parsed = await self._fetch_listing(
+            self.search_url, self._parse_search_page, current_params
         )
-        if response is None:
+        if not ok:
             return None, False
 
-        soup = BeautifulSoup(response.text, "lxml")
-        vacancy_links = soup.select("article.job h2.title a.job-title")
-
-        if not vacancy_links:
+        urls, redirect_urls, has_next_page = parsed
+        if redirect_urls:
+            logging.info(
+                f"Skipping {len(redirect_urls)} rabota.by redirect(s) on belmeta page {page}."
+            )
+            self.redirect_urls.update(redirect_urls)
+        if not urls and not redirect_urls:
             logging.info(f"No vacancy links found on belmeta page {page}.")
             return [], False
-
-        urls = [urljoin(self.base_url, link["href"]) for link in vacancy_links]
-        has_next_page = soup.select_one(".pager .next") is not None
         return urls, has_next_page
 
-    async def scrape_vacancy_details(
-        self, session: AsyncSession, url: str
-    ) -> dict | None:
-        async with self.semaphore:
-            logging.info(f"Scraping belmeta vacancy: {url}")
-            await asyncio.sleep(random.uniform(1.5, 3.0))
-
-            response = await self._make_request(session, url)
-            if response is None:
-                return None
-
-            try:
-                soup = BeautifulSoup(response.text, "lxml")
-
-                if soup.select_one('a[href*="/jrd?"]'):
-                    logging.info(f"Skipping rabota.by redirect: {url}")
-                    return None
-
-                title = self._get_text(soup.select_one("h1"))
-                company = self._get_text(soup.select_one(".company-wrap"))
-
-                salary_element = soup.select_one("td.name.salary + td.value")
-                salary = self._get_text(salary_element, default="не указана")
-
-                location_element = soup.select_one("#spnLocation")
-                location = self._get_text(location_element, default="не указана")
-
-                description_tag = soup.select_one("div.description")
-                description = str(description_tag) if description_tag else "N/A"
-
-                return {
-                    "url": url,
-                    "apply_url": url,
-                    "title": title,
-                    "salary": salary,
-                    "company": company,
-                    "location": location,
-                    "description": description.strip(),
-                }
-            except Exception as e:
-                logging.error(
-                    f"Failed to PARSE belmeta vacancy {url}: {e}", exc_info=True
-                )
-                self._save_failed_page(url, response.text)
-                return None
+    async def scrape_vacancy_details(self, url: str) -> dict | None:
+        logging.info(f"Scraping belmeta vacancy: {url}")
+
+        response = await self._make_request(url)
+        if response is None:
+            return None
+
+        try:
+            details = await run_parser(self._parse_vacancy_details, response.text, url)
+            if details is None:
+                logging.info(f"Skipping rabota.by redirect: {url}")
+                self.redirect_urls.add(url)
+            return details
+        except Exception as e:
+            logging.error(f"Failed to PARSE belmeta vacancy {url}: {e}", exc_info=True)
+            self._save_failed_page(url, response.text)
+            return None
 
     async def scrape_all_vacancies(
         self, params: dict, max_pages: int = 5
     ) -> list[dict]:
         all_vacancies = []
-        async with AsyncSession() as session:
-            for page_num in range(max_pages):
-                urls, has_next_page = await self.get_vacancy_urls_from_page(
-                    session, params, page_num
-                )
-                if urls is None:
-                    logging.error(
-                        f"Could not retrieve URLs from page {page_num}. Stopping scrape."
-                    )
-                    break
-                if not urls:
-                    logging.info(f"No more URLs found on page {page_num}. Stopping.")
-                    break
-
-                tasks = [self.scrape_vacancy_details(session, url) for url in urls]
-                results = await asyncio.gather(*tasks)
-                valid_results = [res for res in results if res]
-                all_vacancies.extend(valid_results)
-                logging.info(
-                    f"Page {page_num} scraped. Found {len(valid_results)} valid vacancies. Total: {len(all_vacancies)}"
+        for page_num in range(max_pages):
+            urls, has_next_page = await self.get_vacancy_urls_from_page(
+                params, page_num
+            )
+            if urls is None:
+                logging.error(
+                    f"Could not retrieve URLs from page {page_num}. Stopping scrape."
                 )
+                break
+            if not urls:
+                logging.info(f"No more URLs found on page {page_num}. Stopping.")
+                break
+
+            tasks = [detail_cache.get_or_fetch(self, url) for url in urls]
+            results = await asyncio.gather(*tasks)
+            valid_results = [res for res in results if res]
+            all_vacancies.extend(valid_results)
+            logging.info(
+                f"Page {page_num} scraped. Found {len(valid_results)} valid vacancies. Total: {len(all_vacancies)}"
+            )
 
-                if not has_next_page:
-                    logging.info("Last page reached. Stopping scrape.")
-                    break
+            if not has_next_page:
+                logging.info("Last page reached. Stopping scrape.")
+                break
 
-                await asyncio.sleep(random.uniform(2.0, 4.0))
+            await asyncio.sleep(random.uniform(2.0, 4.0))
         return all_vacancies
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from database.models import CachedVacancyDetails
+
+
+class DetailCache:
+    def __init__(self, ttl_seconds: float, max_size: int, persistent: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max(1, max_size)
+        self.persistent = persistent
+        self.session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    @property
+    def is_persistent(self) -> bool:
+        return self.persistent and self.session_factory is not None
+
+    def get(self, url: str) -> dict | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        expires_at, details = entry
+        if expires_at < time.monotonic():
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return details
+
+    def set(self, url: str, details: dict, ttl_seconds: float | None = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[url] = (time.monotonic() + ttl, details)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _load_persisted(self, url: str) -> dict | None:
+        async with self.session_factory() as db_session:
+            cached = await db_session.get(CachedVacancyDetails, url)
+        if cached is None:
+            return None
+        age = datetime.utcnow() - cached.fetched_at
+        remaining = self.ttl_seconds - age.total_seconds()
+        if remaining <= 0:
+            return None
+        self.set(url, cached.details, ttl_seconds=remaining)
+        return cached.details
+
+    async def _persist(self, url: str, details: dict):
+        async with self.session_factory() as db_session:
+            await db_session.merge(
+                CachedVacancyDetails(
+                    url=url, details=details, fetched_at=datetime.utcnow()
+                )
+            )
+            await db_session.commit()
+
+    async def prune_expired(self):
+        if not self.is_persistent:
+            return
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        async with self.session_factory() as db_session:
+            result = await db_session.execute(
+                delete(CachedVacancyDetails).where(
+                    CachedVacancyDetails.fetched_at < cutoff
+                )
+            )
+            await db_session.commit()
+        if result.rowcount:
+            logging.info(f"Pruned {result.rowcount} expired cached vacancy detail(s).")
+
+    async def _fetch(self, scraper, url: str) -> dict | None:
+        if self.is_persistent:
+            try:
+                details = await self._load_persisted(url)
+                if details is not None:
+                    self.hits += 1
+                    return details
+            except Exception as e:
+                logging.error(f"Could not read persisted details for {url}: {e}")
+
+        self.misses += 1
+        details = await scraper.scrape_vacancy_details(url)
+        if details:
+            self.set(url, details)
+            if self.is_persistent:
+                try:
+                    await self._persist(url, details)
+                except Exception as e:
+                    logging.error(f"Could not persist details for {url}: {e}")
+        return details
+
+    async def get_or_fetch(self, scraper, url: str) -> dict | None:
+        details = self.get(url)
+        if details is not None:
+            self.hits += 1
+            return details
+
+        if url in self._in_flight:
+            return await asyncio.shield(self._in_flight[url])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[url] = future
+        details = None
+        try:
+            details = await self._fetch(scraper, url)
+            return details
+        finally:
+            future.set_result(details)
+            del self._in_flight[url]
+
+
+detail_cache = DetailCache(
+    ttl_seconds=settings.DETAIL_CACHE_TTL_MINUTES * 60,
+    max_size=settings.DETAIL_CACHE_MAX_SIZE,
+    persistent=settings.DETAIL_CACHE_PERSISTENT,
+)
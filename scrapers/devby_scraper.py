@@ -1,182 +1,165 @@
-import asyncio
 import logging
-import os
-import random
-from datetime import datetime
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from curl_cffi.requests import AsyncSession, RequestsError, Response
+from scrapers.base_scraper import BaseScraper
+from scrapers.detail_cache import detail_cache
+from scrapers.html_parser import Selector, has_class, parsed_document
+from scrapers.parsing import run_parser
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+VACANCY_ITEM = Selector(
+    ".vacancies-list-item__body", f"//*[{has_class('vacancies-list-item__body')}]"
+)
+VACANCY_LINK = Selector(
+    "a.vacancies-list-item__link_block",
+    f".//a[{has_class('vacancies-list-item__link_block')}]",
+)
+TITLE = Selector("h1.title", f"//h1[{has_class('title')}]")
+COMPANY = Selector(
+    ".vacancy__header__company-name a",
+    f"//*[{has_class('vacancy__header__company-name')}]//a",
+)
+INFO_ITEM = Selector(
+    ".vacancy__info-block__item", f"//*[{has_class('vacancy__info-block__item')}]"
+)
+TAG = Selector("a.vacancy__tags__item", f"//a[{has_class('vacancy__tags__item')}]")
+DESCRIPTION = Selector(
+    "div.vacancy__text .text",
+    f"//div[{has_class('vacancy__text')}]//*[{has_class('text')}]",
+)
+
+
+class DevbyScraper(BaseScraper):
+    name = "devby"
+    listing_region = (b"vacancies-list-item", b"<footer")
 
-class DevbyScraper:
     def __init__(self):
+        super().__init__()
         self.base_url = "https://jobs.devby.io"
         self.search_url = self.base_url
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        }
-        self.semaphore = asyncio.Semaphore(5)
-        self.captcha_detected_in_session = False
-        self.debug_dir = "debug/failed_pages"
-        os.makedirs(self.debug_dir, exist_ok=True)
-
-    def _get_text(self, element, default="N/A"):
-        return element.text.strip().replace("\xa0", " ") if element else default
+        self.card_texts: dict[str, str] = {}
+
+    @parsed_document
+    def _parse_search_page(self, document) -> list[tuple[str, str]]:
+        cards = []
+        for item in document.select(VACANCY_ITEM):
+            for link in item.select(VACANCY_LINK):
+                url = urljoin(self.base_url, link["href"])
+                cards.append((url, " ".join(item.text.split())))
+        return cards
+
+    @parsed_document
+    def _parse_vacancy_details(self, document, url: str) -> dict | None:
+        title_element = document.select_one(TITLE)
+        if not title_element:
+            return None
 
-    def _save_failed_page(self, url: str, content: str):
-        if not content:
-            return
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            vacancy_id = url.split("/vacancies/")[1].split("?")[0]
-            filename = os.path.join(
-                self.debug_dir, f"devby_failed_{vacancy_id}_{timestamp}.html"
-            )
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(content)
-            logging.info(f"Saved problematic HTML to {filename}")
-        except Exception as e:
-            logging.error(f"Could not save failed page HTML for {url}: {e}")
+        title = self._get_text(title_element, default="Заголовок не найден")
+        company = self._get_text(
+            document.select_one(COMPANY),
+            default="Компания не найдена",
+        )
 
-    async def _make_request(self, session: AsyncSession, url: str) -> Response | None:
-        try:
-            logging.info(f"Requesting URL: {url}")
-            response = await session.get(
-                url, headers=self.headers, impersonate="chrome136", timeout=25
-            )
-            response.raise_for_status()
-            return response
-        except RequestsError as e:
-            logging.error(f"Request failed for {url}: {e}")
-            return None
+        info_data = {}
+        for item in document.select(INFO_ITEM):
+            text_content = item.get_text(strip=True)
+            if ":" in text_content:
+                key, value = text_content.split(":", 1)
+                info_data[key.strip()] = value.strip()
+
+        salary = info_data.get("Зарплата", "не указана")
+        location = info_data.get("Город", "Локация не указана")
+
+        tags = [self._get_text(tag) for tag in document.select(TAG)]
+
+        description_tag = document.select_one(DESCRIPTION)
+        description_html = description_tag.html if description_tag else "N/A"
+
+        extra_info_lines = [
+            f"<b>{key}:</b> {value}"
+            for key, value in info_data.items()
+            if key not in ["Зарплата", "Город"]
+        ]
+        tags_line = "<b>Тэги:</b> " + ", ".join(tags) if tags else ""
+
+        full_description_parts = []
+        if extra_info_lines:
+            full_description_parts.append("<br>".join(extra_info_lines))
+        if tags_line:
+            full_description_parts.append(tags_line)
+
+        final_description = ""
+        if full_description_parts:
+            final_description += "<p>" + "</p><p>".join(full_description_parts) + "</p>"
+            final_description += "<hr>"
+        final_description += description_html
+
+        return {
+            "url": url,
+            "apply_url": url,
+            "title": title,
+            "salary": salary,
+            "company": company,
+            "location": location,
+            "description": final_description.strip(),
+        }
 
     async def get_vacancy_urls_from_page(
-        self, session: AsyncSession, params: dict, page: int = 0
-    ) -> list[str] | None:
+        self, params: dict, page: int = 0
+    ) -> tuple[list[str] | None, bool]:
         logging.info("Requesting dev.by vacancies list page...")
-        response = await self._make_request(session, self.search_url)
-        if response is None:
-            return None
-
-        soup = BeautifulSoup(response.text, "lxml")
-        vacancy_items = soup.select(
-            ".vacancies-list-item__body a.vacancies-list-item__link_block"
-        )
+        ok, cards = await self._fetch_listing(self.search_url, self._parse_search_page)
+        if not ok:
+            return None, False
 
-        if not vacancy_items:
+        self.card_texts.update(cards)
+        urls = [url for url, _ in cards]
+        if not urls:
             logging.info("No vacancy links found on dev.by main page.")
-            return []
+            return [], False
+        return urls, False
 
-        urls = [urljoin(self.base_url, link["href"]) for link in vacancy_items]
-        return urls
-
-    async def scrape_vacancy_details(
-        self, session: AsyncSession, url: str
-    ) -> dict | None:
-        async with self.semaphore:
-            logging.info(f"Scraping dev.by vacancy: {url}")
-            await asyncio.sleep(random.uniform(1.5, 3.0))
-
-            response = await self._make_request(session, url)
-            if response is None:
-                return None
-
-            try:
-                soup = BeautifulSoup(response.text, "lxml")
-
-                title_element = soup.select_one("h1.title")
-                if not title_element:
-                    logging.warning(
-                        f"Could not find title for dev.by vacancy {url}. Page might be a CAPTCHA or has changed. Saving HTML for debug."
-                    )
-                    self._save_failed_page(url, response.text)
-                    return None
-
-                title = self._get_text(title_element, default="Заголовок не найден")
-                company = self._get_text(
-                    soup.select_one(".vacancy__header__company-name a"),
-                    default="Компания не найдена",
-                )
+    async def scrape_vacancy_details(self, url: str) -> dict | None:
+        logging.info(f"Scraping dev.by vacancy: {url}")
+
+        response = await self._make_request(url)
+        if response is None:
+            return None
 
-                info_data = {}
-                for item in soup.select(".vacancy__info-block__item"):
-                    text_content = item.get_text(strip=True)
-                    if ":" in text_content:
-                        key, value = text_content.split(":", 1)
-                        info_data[key.strip()] = value.strip()
-
-                salary = info_data.get("Зарплата", "не указана")
-                location = info_data.get("Город", "Локация не указана")
-
-                tags = [
-                    self._get_text(tag) for tag in soup.select("a.vacancy__tags__item")
-                ]
-
-                description_tag = soup.select_one("div.vacancy__text .text")
-                description_html = str(description_tag) if description_tag else "N/A"
-
-                extra_info_lines = [
-                    f"<b>{key}:</b> {value}"
-                    for key, value in info_data.items()
-                    if key not in ["Зарплата", "Город"]
-                ]
-                tags_line = "<b>Тэги:</b> " + ", ".join(tags) if tags else ""
-
-                full_description_parts = []
-                if extra_info_lines:
-                    full_description_parts.append("<br>".join(extra_info_lines))
-                if tags_line:
-                    full_description_parts.append(tags_line)
-
-                final_description = ""
-                if full_description_parts:
-                    final_description += (
-                        "<p>" + "</p><p>".join(full_description_parts) + "</p>"
-                    )
-                    final_description += "<hr>"
-                final_description += description_html
-
-                return {
-                    "url": url,
-                    "apply_url": url,
-                    "title": title,
-                    "salary": salary,
-                    "company": company,
-                    "location": location,
-                    "description": final_description.strip(),
-                }
-            except Exception as e:
-                logging.error(
-                    f"Failed to PARSE dev.by vacancy {url}: {e}", exc_info=True
+        try:
+            details = await run_parser(self._parse_vacancy_details, response.text, url)
+            if details is None:
+                logging.warning(
+                    f"Could not find title for dev.by vacancy {url}. Page might be a CAPTCHA or has changed. Saving HTML for debug."
                 )
                 self._save_failed_page(url, response.text)
-                return None
+            return details
+        except Exception as e:
+            logging.error(f"Failed to PARSE dev.by vacancy {url}: {e}", exc_info=True)
+            self._save_failed_page(url, response.text)
+            return None
 
     async def scrape_all_vacancies(self, params: dict = None) -> list[dict]:
         all_vacancies = []
-        async with AsyncSession() as session:
-            urls = await self.get_vacancy_urls_from_page(session, params={})
-            if not urls:
-                logging.info("No vacancies to scrape from dev.by.")
-                return []
+        urls, _ = await self.get_vacancy_urls_from_page(params={})
+        if not urls:
+            logging.info("No vacancies to scrape from dev.by.")
+            return []
 
+        logging.info(
+            f"Found {len(urls)} vacancies. Scraping details sequentially to avoid blocking..."
+        )
+        for i, url in enumerate(urls):
+            details = await detail_cache.get_or_fetch(self, url)
+            if details:
+                all_vacancies.append(details)
             logging.info(
-                f"Found {len(urls)} vacancies. Scraping details sequentially to avoid blocking..."
+                f"Processed {i + 1}/{len(urls)}. Total collected: {len(all_vacancies)}"
             )
-            for i, url in enumerate(urls):
-                details = await self.scrape_vacancy_details(session, url)
-                if details:
-                    all_vacancies.append(details)
-                logging.info(
-                    f"Processed {i + 1}/{len(urls)}. Total collected: {len(all_vacancies)}"
-                )
 
-            logging.info(f"Total vacancies scraped from dev.by: {len(all_vacancies)}")
+        logging.info(f"Total vacancies scraped from dev.by: {len(all_vacancies)}")
 
         return all_vacancies
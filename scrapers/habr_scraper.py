@@ -1,166 +1,182 @@
 import asyncio
 import logging
 import random
-from urllib.parse import urlencode, urljoin
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from curl_cffi.requests import AsyncSession, RequestsError, Response
+from scrapers.base_scraper import BaseScraper
+from scrapers.detail_cache import detail_cache
+from scrapers.html_parser import Selector, has_class, parsed_document
+from scrapers.parsing import run_parser
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+CARD = Selector(".vacancy-card", f"//*[{has_class('vacancy-card')}]")
+CARD_TITLE_LINK = Selector(
+    ".vacancy-card__title-link", f".//*[{has_class('vacancy-card__title-link')}]"
+)
+CARD_COMPANY = Selector(
+    ".vacancy-card__company-title", f".//*[{has_class('vacancy-card__company-title')}]"
+)
+CARD_SALARY = Selector(
+    ".vacancy-card__salary", f".//*[{has_class('vacancy-card__salary')}]"
+)
+CARD_META = Selector(".vacancy-card__meta", f".//*[{has_class('vacancy-card__meta')}]")
+CARD_SKILLS = Selector(
+    ".vacancy-card__skills", f".//*[{has_class('vacancy-card__skills')}]"
+)
+NEXT_PAGE = Selector('a[rel="next"]', '//a[@rel="next"]')
+PAGE_TITLE = Selector(".page-title__title", f"//*[{has_class('page-title__title')}]")
+SALARY = Selector(".basic-salary__amount", f"//*[{has_class('basic-salary__amount')}]")
+COMPANY_NAME = Selector(".company_name a", f"//*[{has_class('company_name')}]//a")
+LOCATION = Selector(
+    ".location-info__location", f"//*[{has_class('location-info__location')}]"
+)
+DESCRIPTION = Selector(
+    ".vacancy-description__text", f"//*[{has_class('vacancy-description__text')}]"
+)
+
+
+class HabrScraper(BaseScraper):
+    name = "habr"
+    impersonate = "chrome124"
+    listing_region = (b"vacancy-card", b"<footer")
 
-class HabrScraper:
     def __init__(self):
+        super().__init__()
         self.base_url = "https://career.habr.com"
         self.search_url = f"{self.base_url}/vacancies"
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Cache-Control": "max-age=0",
-            "Referer": "https://career.habr.com/",
-            "Sec-Ch-Ua": '"Chromium";v="124", "Google Chrome";v="124", "Not-A.Brand";v="99"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Windows"',
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "same-origin",
-            "Sec-Fetch-User": "?1",
-            "Upgrade-Insecure-Requests": "1",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-        }
-        self.semaphore = asyncio.Semaphore(5)
-
-    def _get_text(self, element):
-        return element.text.strip().replace("\xa0", " ") if element else "N/A"
+        self.headers.update(
+            {
+                "Cache-Control": "max-age=0",
+                "Referer": "https://career.habr.com/",
+                "Sec-Ch-Ua": '"Chromium";v="124", "Google Chrome";v="124", "Not-A.Brand";v="99"',
+                "Sec-Ch-Ua-Mobile": "?0",
+                "Sec-Ch-Ua-Platform": '"Windows"',
+                "Sec-Fetch-Dest": "document",
+                "Sec-Fetch-Mode": "navigate",
+                "Sec-Fetch-Site": "same-origin",
+                "Sec-Fetch-User": "?1",
+                "Upgrade-Insecure-Requests": "1",
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+            }
+        )
+        self.vacancy_summaries: dict[str, dict] = {}
 
-    async def _make_request(
-        self, session: AsyncSession, url: str, params: dict = None
-    ) -> Response | None:
-        try:
-            full_url = url
-            if params:
-                full_url += "?" + urlencode(params, doseq=True)
-            logging.info(f"Requesting URL: {full_url}")
-
-            response = await session.get(
-                url,
-                params=params,
-                headers=self.headers,
-                impersonate="chrome124",
-                timeout=25,
-            )
-            response.raise_for_status()
-            return response
-        except RequestsError as e:
-            logging.error(f"Request failed for {url} with params {params}: {e}")
+    def _summarize_card(self, card) -> dict | None:
+        title_link = card.select_one(CARD_TITLE_LINK)
+        if not title_link:
             return None
 
+        url = urljoin(self.base_url, title_link["href"])
+        salary = self._get_text(card.select_one(CARD_SALARY))
+        return {
+            "url": url,
+            "apply_url": url,
+            "title": self._get_text(title_link),
+            "salary": salary if salary not in ("", "N/A") else "не указана",
+            "company": self._get_text(card.select_one(CARD_COMPANY)),
+            "location": self._get_text(card.select_one(CARD_META)),
+            "description": self._get_text(card.select_one(CARD_SKILLS)),
+        }
+
+    @parsed_document
+    def _parse_search_page(self, document) -> tuple[list[dict], bool]:
+        summaries = [self._summarize_card(card) for card in document.select(CARD)]
+        summaries = [summary for summary in summaries if summary]
+        if not summaries:
+            return [], False
+
+        has_next_page = document.select_one(NEXT_PAGE) is not None
+        return summaries, has_next_page
+
+    @parsed_document
+    def _parse_vacancy_details(self, document, url: str) -> dict:
+        title = self._get_text(document.select_one(PAGE_TITLE))
+        salary = self._get_text(document.select_one(SALARY)) or "не указана"
+        company = self._get_text(document.select_one(COMPANY_NAME))
+
+        location_parts = [self._get_text(el) for el in document.select(LOCATION)]
+        location = ", ".join(filter(None, location_parts))
+
+        description_tag = document.select_one(DESCRIPTION)
+        description = description_tag.html if description_tag else "N/A"
+
+        return {
+            "url": url,
+            "apply_url": url,
+            "title": title,
+            "salary": salary,
+            "company": company,
+            "location": location,
+            "description": description,
+        }
+
     async def get_vacancy_urls_from_page(
-        self, session: AsyncSession, params: dict, page: int
-    ) -> list[str] | None:
+        self, params: dict, page: int
+    ) -> tuple[list[str] | None, bool]:
         current_params = params.copy()
         current_params["page"] = page + 1
 
-        response = await self._make_request(
-            session, self.search_url, params=current_params
+        ok, parsed = await self._fetch_listing(
+            self.search_url, self._parse_search_page, current_params
         )
-        if response is None:
-            return None
+        if not ok:
+            return None, False
 
-        soup = BeautifulSoup(response.text, "lxml")
-        vacancy_cards = soup.select(".vacancy-card__title-link")
-        if not vacancy_cards:
+        summaries, has_next_page = parsed
+        self.vacancy_summaries.update(
+            (summary["url"], summary) for summary in summaries
+        )
+        urls = [summary["url"] for summary in summaries]
+        if not urls:
             logging.info(
                 f"No vacancies found on page {page} for query '{params.get('q', '')}'."
             )
-            return []
-
-        urls = [urljoin(self.base_url, card["href"]) for card in vacancy_cards]
-        return urls
-
-    async def scrape_vacancy_details(
-        self, session: AsyncSession, url: str
-    ) -> dict | None:
-        async with self.semaphore:
-            logging.info(f"Scraping Habr vacancy: {url}")
-            await asyncio.sleep(random.uniform(1.5, 3.0))
-
-            response = await self._make_request(session, url)
-            if response is None:
-                return None
-
-            try:
-                soup = BeautifulSoup(response.text, "lxml")
-                title = self._get_text(soup.select_one(".page-title__title"))
-                salary = (
-                    self._get_text(soup.select_one(".basic-salary__amount"))
-                    or "не указана"
-                )
-                company = self._get_text(soup.select_one(".company_name a"))
-
-                location_parts = [
-                    self._get_text(el) for el in soup.select(".location-info__location")
-                ]
-                location = ", ".join(filter(None, location_parts))
-
-                description_tag = soup.select_one(".vacancy-description__text")
-                description = str(description_tag) if description_tag else "N/A"
-
-                return {
-                    "url": url,
-                    "apply_url": url,
-                    "title": title,
-                    "salary": salary,
-                    "company": company,
-                    "location": location,
-                    "description": description,
-                }
-            except Exception as e:
-                logging.error(f"Failed to PARSE Habr vacancy {url}: {e}", exc_info=True)
-                return None
+            return [], False
+        return urls, has_next_page
+
+    async def scrape_vacancy_details(self, url: str) -> dict | None:
+        logging.info(f"Scraping Habr vacancy: {url}")
+
+        response = await self._make_request(url)
+        if response is None:
+            return None
+
+        try:
+            return await run_parser(self._parse_vacancy_details, response.text, url)
+        except Exception as e:
+            logging.error(f"Failed to PARSE Habr vacancy {url}: {e}", exc_info=True)
+            return None
 
     async def scrape_all_vacancies(
         self, params: dict, max_pages: int = 5
     ) -> list[dict]:
         all_vacancies = []
-        async with AsyncSession() as session:
-            for page_num in range(max_pages):
-                urls = await self.get_vacancy_urls_from_page(session, params, page_num)
-                if urls is None:
-                    logging.error(
-                        f"Could not retrieve URLs from page {page_num}. Stopping scrape for this subscription."
-                    )
-                    break
-                if not urls:
-                    logging.info(f"No more URLs found on page {page_num}. Stopping.")
-                    break
-
-                tasks = [self.scrape_vacancy_details(session, url) for url in urls]
-                results = await asyncio.gather(*tasks)
-                all_vacancies.extend([res for res in results if res])
-                logging.info(
-                    f"Page {page_num} scraped. Total vacancies: {len(all_vacancies)}"
+        for page_num in range(max_pages):
+            urls, has_next_page = await self.get_vacancy_urls_from_page(
+                params, page_num
+            )
+            if urls is None:
+                logging.error(
+                    f"Could not retrieve URLs from page {page_num}. Stopping scrape for this subscription."
                 )
+                break
+            if not urls:
+                logging.info(f"No more URLs found on page {page_num}. Stopping.")
+                break
+
+            tasks = [detail_cache.get_or_fetch(self, url) for url in urls]
+            results = await asyncio.gather(*tasks)
+            all_vacancies.extend([res for res in results if res])
+            logging.info(
+                f"Page {page_num} scraped. Total vacancies: {len(all_vacancies)}"
+            )
 
-                test_params = params.copy()
-                test_params["page"] = page_num + 2
-                response = await self._make_request(
-                    session, self.search_url, params=test_params
-                )
-                if response:
-                    soup = BeautifulSoup(response.text, "lxml")
-                    if not soup.select_one(".vacancy-card__title-link"):
-                        logging.info(
-                            "This was the last page of results. Stopping scrape."
-                        )
-                        break
-                else:
-                    logging.warning(
-                        f"Could not verify next page ({page_num + 1}), stopping."
-                    )
-                    break
-
-                await asyncio.sleep(random.uniform(2.5, 5.0))
+            if not has_next_page:
+                logging.info("This was the last page of results. Stopping scrape.")
+                break
+
+            await asyncio.sleep(random.uniform(2.5, 5.0))
         return all_vacancies
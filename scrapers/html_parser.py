@@ -0,0 +1,109 @@
+import functools
+import logging
+
+import lxml.html
+import soupsieve
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from config import settings
+
+
+def has_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+class Selector:
+    def __init__(self, css: str, xpath: str):
+        self.css = soupsieve.compile(css)
+        self.xpath = etree.XPath(xpath)
+
+
+class LxmlNode:
+    def __init__(self, element):
+        self.element = element
+
+    def select_one(self, selector: Selector) -> "LxmlNode | None":
+        found = selector.xpath(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    def select(self, selector: Selector) -> list["LxmlNode"]:
+        return [LxmlNode(element) for element in selector.xpath(self.element)]
+
+    def find(self, tag: str) -> "LxmlNode | None":
+        element = self.element.find(f".//{tag}")
+        return LxmlNode(element) if element is not None else None
+
+    @property
+    def text(self) -> str:
+        return self.element.text_content()
+
+    def get_text(self, strip: bool = False) -> str:
+        if not strip:
+            return self.text
+        strings = (text.strip() for text in self.element.xpath(".//text()"))
+        return "".join(text for text in strings if text)
+
+    @property
+    def html(self) -> str:
+        return lxml.html.tostring(self.element, encoding="unicode", with_tail=False)
+
+    def __getitem__(self, attribute: str) -> str:
+        value = self.element.get(attribute)
+        if value is None:
+            raise KeyError(attribute)
+        return value
+
+
+class SoupNode:
+    def __init__(self, tag):
+        self.tag = tag
+
+    def select_one(self, selector: Selector) -> "SoupNode | None":
+        found = selector.css.select_one(self.tag)
+        return SoupNode(found) if found is not None else None
+
+    def select(self, selector: Selector) -> list["SoupNode"]:
+        return [SoupNode(tag) for tag in selector.css.select(self.tag)]
+
+    def find(self, tag: str) -> "SoupNode | None":
+        found = self.tag.find(tag)
+        return SoupNode(found) if found is not None else None
+
+    @property
+    def text(self) -> str:
+        return self.tag.text
+
+    def get_text(self, strip: bool = False) -> str:
+        return self.tag.get_text(strip=strip)
+
+    @property
+    def html(self) -> str:
+        return str(self.tag)
+
+    def __getitem__(self, attribute: str) -> str:
+        return self.tag[attribute]
+
+
+def parse_html(html: str, backend: str | None = None) -> LxmlNode | SoupNode:
+    backend = backend or settings.PARSER_BACKEND
+    if backend == "lxml":
+        return LxmlNode(lxml.html.document_fromstring(html))
+    return SoupNode(BeautifulSoup(html, "lxml"))
+
+
+def parsed_document(parse_method):
+    @functools.wraps(parse_method)
+    def wrapper(self, html: str, *args):
+        try:
+            return parse_method(self, parse_html(html), *args)
+        except Exception as e:
+            if settings.PARSER_BACKEND != "lxml":
+                raise
+            logging.warning(
+                f"Fast parser failed in {parse_method.__qualname__}: {e}. "
+                f"Falling back to BeautifulSoup."
+            )
+            return parse_method(self, parse_html(html, backend="bs4"), *args)
+
+    return wrapper
@@ -0,0 +1,44 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from config import settings
+
+
+@dataclass
+class ListingEntry:
+    content_hash: str
+    parsed: Any
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class ListingCache:
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict[str, ListingEntry] = OrderedDict()
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def get(self, key: str) -> ListingEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: ListingEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def log_summary(self):
+        logging.info(
+            f"Listing cache: {self.not_modified} not modified, "
+            f"{self.unchanged} unchanged by hash, {self.changed} parsed."
+        )
+
+
+listing_cache = ListingCache(max_size=settings.LISTING_CACHE_MAX_SIZE)
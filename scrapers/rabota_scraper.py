@@ -2,68 +2,174 @@ import asyncio
 import json
 import logging
 import random
+import re
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from curl_cffi.requests import AsyncSession, RequestsError, Response
+from scrapers.base_scraper import BaseScraper
+from scrapers.detail_cache import detail_cache
+from scrapers.html_parser import Selector, parsed_document
+from scrapers.parsing import run_parser
 
+INITIAL_STATE_MARKER = b'id="HH-Lux-InitialState"'
+SEARCH_RESULT_KEY = b'"vacancySearchResult"'
+SNIPPET_KEYS = ("requirement", "responsibility", "req", "resp")
+
+
+def _data_qa(value: str) -> Selector:
+    return Selector(f'[data-qa="{value}"]', f'//*[@data-qa="{value}"]')
+
+
+INITIAL_STATE = Selector(
+    "template#HH-Lux-InitialState", '//template[@id="HH-Lux-InitialState"]'
+)
+VACANCY_TITLE = _data_qa("vacancy-title")
+VACANCY_SALARY = _data_qa("vacancy-salary")
+VACANCY_COMPANY = _data_qa("vacancy-company-name")
+VACANCY_RAW_ADDRESS = _data_qa("vacancy-view-raw-address")
+VACANCY_LOCATION = _data_qa("vacancy-view-location")
+VACANCY_DESCRIPTION = _data_qa("vacancy-description")
+VACANCY_APPLY_LINK = _data_qa("vacancy-response-link-top")
+
+
+class RabotaScraper(BaseScraper):
+    name = "rabota"
+    blocked_marker = "Подтвердите, что вы не робот"
+    listing_region = (SEARCH_RESULT_KEY, b"</template>")
+    listing_as_bytes = True
 
-class RabotaScraper:
     def __init__(self, city: str):
+        super().__init__()
         self.city_subdomain = city if city not in ["minsk", "all"] else ""
         self.base_url = f"https://{self.city_subdomain + '.' if self.city_subdomain else ''}rabota.by"
         self.search_url = f"{self.base_url}/search/vacancy"
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        }
-        self.semaphore = asyncio.Semaphore(5)
-        self.captcha_detected_in_session = False
-
-    def _get_text(self, element):
-        return element.text.strip().replace("\xa0", " ") if element else "N/A"
+        self.vacancy_summaries: dict[str, dict] = {}
 
     def _parse_salary(self, salary_str: str) -> str:
         if not salary_str or salary_str == "N/A":
             return "не указана"
         return salary_str.replace("\u202f", " ").replace("\xa0", " ")
 
-    async def _make_request_with_retries(
-        self, session: AsyncSession, url: str, params: dict = None
-    ) -> Response | None:
-        retries = 3
-        delays = [0, 5, 10]
-
-        for i in range(retries):
-            try:
-                if delays[i] > 0:
-                    logging.warning(
-                        f"CAPTCHA detected for {url}. Retrying in {delays[i]} seconds... (Attempt {i + 1}/{retries})"
-                    )
-                    await asyncio.sleep(delays[i])
-
-                response = await session.get(
-                    url,
-                    params=params,
-                    headers=self.headers,
-                    impersonate="chrome136",
-                    timeout=25,
-                )
-                response.raise_for_status()
+    def _format_compensation(self, compensation: dict | None) -> str:
+        if not compensation or compensation.get("noCompensation"):
+            return "не указана"
+        parts = []
+        if compensation.get("from"):
+            parts.append(f"от {compensation['from']}")
+        if compensation.get("to"):
+            parts.append(f"до {compensation['to']}")
+        if not parts:
+            return "не указана"
+        parts.append(compensation.get("currencyCode", ""))
+        return " ".join(parts).strip()
+
+    def _summarize_vacancy(self, vacancy: dict) -> dict | None:
+        url = (vacancy.get("links") or {}).get("desktop")
+        if not url:
+            return None
+
+        snippet = vacancy.get("snippet") or {}
+        snippet_text = " ".join(
+            re.sub(r"<[^>]+>", "", snippet[key]).strip()
+            for key in SNIPPET_KEYS
+            if snippet.get(key)
+        )
+        company = vacancy.get("company") or {}
+        location = (vacancy.get("address") or {}).get("rawAddress") or (
+            vacancy.get("area") or {}
+        ).get("name")
+
+        return {
+            "url": url,
+            "apply_url": url,
+            "title": vacancy.get("name") or "N/A",
+            "salary": self._format_compensation(vacancy.get("compensation")),
+            "company": company.get("visibleName") or company.get("name") or "N/A",
+            "location": location or "N/A",
+            "description": snippet_text or "N/A",
+        }
 
-                if "Подтвердите, что вы не робот" not in response.text:
-                    return response
+    def _extract_search_result(self, content: bytes) -> dict | None:
+        start = content.find(INITIAL_STATE_MARKER)
+        if start == -1:
+            return None
+        start = content.find(b">", start) + 1
+        end = content.find(b"</template>", start)
+        if not start or end == -1:
+            return None
 
-            except RequestsError as e:
-                logging.error(f"Request failed on attempt {i + 1} for {url}: {e}")
-                if i == retries - 1:
-                    break
+        key = content.find(SEARCH_RESULT_KEY, start, end)
+        if key == -1:
+            return None
+        value_start = content.find(b":", key + len(SEARCH_RESULT_KEY), end) + 1
+        payload = content[value_start:end].decode("utf-8").lstrip()
+        search_result, _ = json.JSONDecoder().raw_decode(payload)
+        if not isinstance(search_result, dict) or "vacancies" not in search_result:
+            return None
+        return search_result
 
-        logging.error(f"Failed to bypass CAPTCHA for {url} after {retries} attempts.")
-        return None
+    @parsed_document
+    def _parse_initial_state(self, document) -> dict | None:
+        template_tag = document.select_one(INITIAL_STATE)
+        if not template_tag:
+            return None
+        search_result = json.loads(template_tag.text).get("vacancySearchResult")
+        return search_result if isinstance(search_result, dict) else {}
+
+    def _parse_search_page(self, content: bytes) -> tuple[list[dict], bool] | None:
+        try:
+            search_result = self._extract_search_result(content)
+        except ValueError as e:
+            logging.warning(f"Could not slice HH-Lux-InitialState from raw page: {e}")
+            search_result = None
+        if search_result is None:
+            search_result = self._parse_initial_state(
+                content.decode("utf-8", "replace")
+            )
+        if search_result is None:
+            return None
+
+        vacancies = search_result.get("vacancies", [])
+        if not vacancies:
+            return [], False
+
+        summaries = [self._summarize_vacancy(vac) for vac in vacancies]
+        summaries = [summary for summary in summaries if summary]
+        return summaries, search_result.get("hasNextPage", False)
+
+    @parsed_document
+    def _parse_vacancy_details(self, document, url: str) -> dict | None:
+        title_element = document.select_one(VACANCY_TITLE)
+        if not title_element:
+            return None
+
+        title = self._get_text(title_element)
+        salary = self._parse_salary(self._get_text(document.select_one(VACANCY_SALARY)))
+        company_tag = document.select_one(VACANCY_COMPANY)
+        company_name = (
+            self._get_text(company_tag.find("span")) if company_tag else "N/A"
+        )
+        location = self._get_text(
+            document.select_one(VACANCY_RAW_ADDRESS)
+        ) or self._get_text(document.select_one(VACANCY_LOCATION))
+        description_tag = document.select_one(VACANCY_DESCRIPTION)
+        description = description_tag.html if description_tag else "N/A"
+        apply_link_tag = document.select_one(VACANCY_APPLY_LINK)
+        apply_url = (
+            urljoin(self.base_url, apply_link_tag["href"]) if apply_link_tag else url
+        )
+
+        return {
+            "url": url,
+            "apply_url": apply_url,
+            "title": title,
+            "salary": salary,
+            "company": company_name,
+            "location": location,
+            "description": description,
+        }
 
     async def get_vacancy_urls_from_page(
-        self, session: AsyncSession, params: dict, page: int
+        self, params: dict, page: int
     ) -> tuple[list[str] | None, bool]:
         current_params = params.copy()
         current_params["page"] = page
@@ -71,132 +177,82 @@ class RabotaScraper:
             f"Requesting search page #{page} with query '{params.get('text', '')}' and area '{params.get('area', 'default')}'"
         )
 
-        response = await self._make_request_with_retries(
-            session, self.search_url, params=current_params
+        ok, parsed = await self._fetch_listing(
+            self.search_url, self._parse_search_page, current_params
         )
-        if response is None:
-            self.captcha_detected_in_session = True
+        if not ok:
             return None, False
-
-        soup = BeautifulSoup(response.text, "lxml")
-        template_tag = soup.select_one("template#HH-Lux-InitialState")
-        if not template_tag:
+        if parsed is None:
             logging.error(f"Could not find HH-Lux-InitialState tag on page {page}.")
             return None, False
 
-        json_data = json.loads(template_tag.string)
-        vacancies = json_data.get("vacancySearchResult", {}).get("vacancies", [])
-        if not vacancies:
+        summaries, has_next_page = parsed
+        self.vacancy_summaries.update(
+            (summary["url"], summary) for summary in summaries
+        )
+        urls = [summary["url"] for summary in summaries]
+        if not urls:
             logging.info(f"No vacancies found in JSON on page {page}.")
             return [], False
-
-        urls = [
-            vac.get("links", {}).get("desktop")
-            for vac in vacancies
-            if vac.get("links", {}).get("desktop")
-        ]
-        has_next_page = json_data.get("vacancySearchResult", {}).get(
-            "hasNextPage", False
-        )
         return urls, has_next_page
 
-    async def scrape_vacancy_details(
-        self, session: AsyncSession, url: str
-    ) -> dict | None:
-        async with self.semaphore:
-            logging.info(f"Scraping vacancy: {url}")
-            await asyncio.sleep(random.uniform(1.5, 3.0))
-
-            response = await self._make_request_with_retries(session, url)
-            if response is None:
-                self.captcha_detected_in_session = True
-                return None
-
-            try:
-                soup = BeautifulSoup(response.text, "lxml")
-                title_element = soup.select_one('[data-qa="vacancy-title"]')
-                if not title_element:
-                    logging.warning(
-                        f"Could not find title for vacancy {url}. Page structure might be different. Skipping."
-                    )
-                    return None
-
-                title = self._get_text(title_element)
-                salary = self._parse_salary(
-                    self._get_text(soup.select_one('[data-qa="vacancy-salary"]'))
-                )
-                company_tag = soup.select_one('[data-qa="vacancy-company-name"]')
-                company_name = (
-                    self._get_text(company_tag.find("span")) if company_tag else "N/A"
-                )
-                location = self._get_text(
-                    soup.select_one('[data-qa="vacancy-view-raw-address"]')
-                ) or self._get_text(
-                    soup.select_one('[data-qa="vacancy-view-location"]')
-                )
-                description_tag = soup.select_one('[data-qa="vacancy-description"]')
-                description = str(description_tag) if description_tag else "N/A"
-                apply_link_tag = soup.select_one(
-                    '[data-qa="vacancy-response-link-top"]'
-                )
-                apply_url = (
-                    urljoin(self.base_url, apply_link_tag["href"])
-                    if apply_link_tag
-                    else url
-                )
+    async def scrape_vacancy_details(self, url: str) -> dict | None:
+        logging.info(f"Scraping vacancy: {url}")
 
-                return {
-                    "url": url,
-                    "apply_url": apply_url,
-                    "title": title,
-                    "salary": salary,
-                    "company": company_name,
-                    "location": location,
-                    "description": description,
-                }
-            except Exception as e:
-                logging.error(
-                    f"Failed to PARSE vacancy {url} after successful request: {e}"
-                )
-                return None
+        response = await self._make_request(url)
+        if response is None:
+            return None
+
+        try:
+            details = await run_parser(self._parse_vacancy_details, response.text, url)
+        except Exception as e:
+            logging.error(
+                f"Failed to PARSE vacancy {url} after successful request: {e}"
+            )
+            return None
+
+        if details is None:
+            logging.warning(
+                f"Could not find title for vacancy {url}. Page structure might be different. Skipping."
+            )
+        return details
 
     async def scrape_all_vacancies(
         self, params: dict, max_pages: int = 5
     ) -> list[dict]:
         all_vacancies = []
-        async with AsyncSession() as session:
-            for page_num in range(max_pages):
-                if self.captcha_detected_in_session:
-                    logging.error(
-                        "CAPTCHA was detected and retries failed. Stopping export for this subscription."
-                    )
-                    break
-
-                urls, has_next_page = await self.get_vacancy_urls_from_page(
-                    session, params, page_num
+        for page_num in range(max_pages):
+            if self.captcha_detected_in_session:
+                logging.error(
+                    "CAPTCHA was detected and retries failed. Stopping export for this subscription."
                 )
-                if urls is None:
-                    break
-                if not urls:
-                    logging.info(
-                        f"No more URLs found on page {page_num}. Stopping export scrape."
-                    )
-                    break
-
-                tasks = [self.scrape_vacancy_details(session, url) for url in urls]
-                results = await asyncio.gather(*tasks)
-
-                successful_results = [res for res in results if res]
-                all_vacancies.extend(successful_results)
+                break
 
+            urls, has_next_page = await self.get_vacancy_urls_from_page(
+                params, page_num
+            )
+            if urls is None:
+                break
+            if not urls:
                 logging.info(
-                    f"Page {page_num} scraped. Found {len(successful_results)} valid vacancies. New total: {len(all_vacancies)}"
+                    f"No more URLs found on page {page_num}. Stopping export scrape."
                 )
+                break
+
+            tasks = [detail_cache.get_or_fetch(self, url) for url in urls]
+            results = await asyncio.gather(*tasks)
+
+            successful_results = [res for res in results if res]
+            all_vacancies.extend(successful_results)
+
+            logging.info(
+                f"Page {page_num} scraped. Found {len(successful_results)} valid vacancies. New total: {len(all_vacancies)}"
+            )
 
-                if not has_next_page:
-                    logging.info("Last page reached. Stopping scrape.")
-                    break
+            if not has_next_page:
+                logging.info("Last page reached. Stopping scrape.")
+                break
 
-                await asyncio.sleep(random.uniform(3.0, 6.0))
+            await asyncio.sleep(random.uniform(3.0, 6.0))
 
         return all_vacancies
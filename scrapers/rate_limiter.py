@@ -0,0 +1,77 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from config import settings
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class HostRateLimiter:
+    def __init__(
+        self,
+        default_rate: float,
+        burst: int,
+        max_concurrent: int,
+        host_rates: dict[str, float] | None = None,
+    ):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.max_concurrent = max(1, max_concurrent)
+        self.host_rates = host_rates or {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        hostname = (urlparse(url).hostname or "").lower()
+        return ".".join(hostname.split(".")[-2:])
+
+    def _get_bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            rate = self.host_rates.get(key, self.default_rate)
+            self._buckets[key] = TokenBucket(rate, self.burst)
+        return self._buckets[key]
+
+    def _get_semaphore(self, key: str) -> asyncio.Semaphore:
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphores[key]
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        key = self.host_key(url)
+        async with self._get_semaphore(key):
+            await self._get_bucket(key).acquire()
+            yield
+
+
+rate_limiter = HostRateLimiter(
+    default_rate=settings.RATE_LIMIT_DEFAULT_RPS,
+    burst=settings.RATE_LIMIT_BURST,
+    max_concurrent=settings.RATE_LIMIT_MAX_CONCURRENT_PER_HOST,
+    host_rates=settings.RATE_LIMIT_HOST_RPS,
+)
@@ -0,0 +1,49 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    blocked: int = 0
+    bytes_received: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.requests if self.requests else 0.0
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.hosts: dict[str, HostStats] = defaultdict(HostStats)
+
+    def record_response(self, host: str, seconds: float, size: int):
+        stats = self.hosts[host]
+        stats.requests += 1
+        stats.total_seconds += seconds
+        stats.bytes_received += size
+
+    def record_failure(self, host: str):
+        self.hosts[host].failures += 1
+
+    def record_retry(self, host: str):
+        self.hosts[host].retries += 1
+
+    def record_blocked(self, host: str):
+        self.hosts[host].blocked += 1
+
+    def log_summary(self):
+        for host, stats in sorted(self.hosts.items()):
+            logging.info(
+                f"HTTP stats for {host}: {stats.requests} response(s), "
+                f"{stats.failures} failure(s), {stats.retries} retry(ies), "
+                f"{stats.blocked} blocked, avg {stats.average_seconds:.2f}s, "
+                f"{stats.bytes_received / 1024 / 1024:.1f} MB received."
+            )
+
+
+request_metrics = RequestMetrics()
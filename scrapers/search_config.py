@@ -0,0 +1,59 @@
+from database.models import Subscription
+from scrapers.belmeta_scraper import BelmetaScraper
+from scrapers.devby_scraper import DevbyScraper
+from scrapers.habr_scraper import HabrScraper
+from scrapers.praca_scraper import PracaScraper
+from scrapers.rabota_scraper import RabotaScraper
+
+
+def get_search_config(sub: Subscription) -> tuple[str | None, dict, str | None]:
+    city = None
+    params_for_scraper = {}
+    keyword = None
+
+    if sub.search_type == "rabota_by":
+        search_config = sub.search_params
+        city = search_config.get("city", "minsk")
+        params_for_scraper = search_config.get("params", {})
+        keyword = params_for_scraper.get("text", "").lower()
+    elif sub.search_type == "habr_career":
+        params_for_scraper = sub.search_params
+        keyword = params_for_scraper.get("q", "").lower()
+    elif sub.search_type == "dev_by":
+        params_for_scraper = {}
+        keyword = sub.search_params.get("q", "").lower()
+    elif sub.search_type == "belmeta_com":
+        params_for_scraper = sub.search_params
+        keyword = params_for_scraper.get("q", "").lower()
+    elif sub.search_type == "praca_by":
+        params_for_scraper = sub.search_params
+        keyword = params_for_scraper.get("query", "").lower()
+
+    return city, params_for_scraper, keyword
+
+
+def create_scraper(search_type: str, city: str | None):
+    if search_type == "rabota_by":
+        return RabotaScraper(city=city)
+    if search_type == "habr_career":
+        return HabrScraper()
+    if search_type == "dev_by":
+        return DevbyScraper()
+    if search_type == "belmeta_com":
+        return BelmetaScraper()
+    if search_type == "praca_by":
+        return PracaScraper()
+    return None
+
+
+def keyword_filter(sub: Subscription) -> str | None:
+    _, _, keyword = get_search_config(sub)
+    if sub.search_type == "dev_by" and keyword:
+        return keyword
+    return None
+
+
+def matches_keyword(keyword: str, details: dict) -> bool:
+    title_lower = details.get("title", "").lower()
+    desc_lower = details.get("description", "").lower()
+    return keyword in title_lower or keyword in desc_lower
@@ -0,0 +1,124 @@
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from curl_cffi.const import CurlInfo
+from curl_cffi.requests import AsyncSession, Response
+
+from config import settings
+from scrapers.rate_limiter import rate_limiter
+
+
+@dataclass(eq=False)
+class PooledSession:
+    session: AsyncSession
+    created_at: float
+    requests: int = 0
+    in_flight: int = 0
+
+
+@dataclass
+class PoolStats:
+    sessions_opened: int = 0
+    sessions_recycled: int = 0
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+
+
+class SessionPool:
+    def __init__(self, max_age_seconds: float, max_requests: int, max_clients: int):
+        self.max_age_seconds = max_age_seconds
+        self.max_requests = max(1, max_requests)
+        self.max_clients = max(1, max_clients)
+        self._sessions: dict[tuple[str, str], PooledSession] = {}
+        self._retired: set[PooledSession] = set()
+        self.stats: dict[str, PoolStats] = defaultdict(PoolStats)
+
+    def _is_stale(self, pooled: PooledSession) -> bool:
+        return (
+            time.monotonic() - pooled.created_at > self.max_age_seconds
+            or pooled.requests >= self.max_requests
+        )
+
+    def _open(self, key: tuple[str, str]) -> PooledSession:
+        host, impersonate = key
+        pooled = PooledSession(
+            session=AsyncSession(
+                impersonate=impersonate,
+                max_clients=self.max_clients,
+                curl_infos=[CurlInfo.NUM_CONNECTS],
+            ),
+            created_at=time.monotonic(),
+        )
+        self._sessions[key] = pooled
+        self.stats[host].sessions_opened += 1
+        return pooled
+
+    async def _retire(self, host: str, pooled: PooledSession):
+        self.stats[host].sessions_recycled += 1
+        if pooled.in_flight:
+            self._retired.add(pooled)
+        else:
+            await pooled.session.close()
+
+    async def _acquire(self, key: tuple[str, str]) -> PooledSession:
+        pooled = self._sessions.get(key)
+        if pooled is not None and not self._is_stale(pooled):
+            pooled.in_flight += 1
+            return pooled
+
+        stale = pooled
+        pooled = self._open(key)
+        pooled.in_flight += 1
+        if stale is not None:
+            await self._retire(key[0], stale)
+        return pooled
+
+    async def _release(self, pooled: PooledSession):
+        pooled.in_flight -= 1
+        pooled.requests += 1
+        if pooled in self._retired and not pooled.in_flight:
+            self._retired.discard(pooled)
+            await pooled.session.close()
+
+    def _record_connection(self, host: str, response: Response):
+        stats = self.stats[host]
+        stats.requests += 1
+        if response.infos.get(CurlInfo.NUM_CONNECTS):
+            stats.new_connections += 1
+        else:
+            stats.reused_connections += 1
+
+    async def get(self, url: str, impersonate: str, **kwargs) -> Response:
+        host = rate_limiter.host_key(url)
+        pooled = await self._acquire((host, impersonate))
+        try:
+            response = await pooled.session.get(url, **kwargs)
+        finally:
+            await self._release(pooled)
+        self._record_connection(host, response)
+        return response
+
+    def log_summary(self):
+        for host, stats in sorted(self.stats.items()):
+            logging.info(
+                f"Session pool for {host}: {stats.requests} request(s), "
+                f"{stats.reused_connections} reused / {stats.new_connections} new "
+                f"connection(s), {stats.sessions_opened} session(s) opened, "
+                f"{stats.sessions_recycled} recycled."
+            )
+
+    async def close(self):
+        for pooled in [*self._sessions.values(), *self._retired]:
+            await pooled.session.close()
+        self._sessions.clear()
+        self._retired.clear()
+
+
+session_pool = SessionPool(
+    max_age_seconds=settings.SESSION_POOL_MAX_AGE_MINUTES * 60,
+    max_requests=settings.SESSION_POOL_MAX_REQUESTS,
+    max_clients=settings.RATE_LIMIT_MAX_CONCURRENT_PER_HOST,
+)